@@ -1,45 +1,288 @@
 import logging
-from gensim.corpora import WikiCorpus
-from simplemma import lemmatize
-from collections import Counter
+import argparse
+import itertools
+import os
+import pickle
+import zlib
+from functools import lru_cache
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+from simplemma import lemmatize
 import time
 
-INPUT_FILE = "fiwiki-latest-pages-articles.xml.bz2" 
+from corpus_sources import DEFAULT_PATHS, open_corpus, add_source_arguments, get_texts_from, resume_point
+from sketch import SketchCounter, SKETCH_EPSILON, SKETCH_DELTA, TOP_K
+from incremental import update_counts, INCREMENTAL_STORE_FILE
+from lemma_dict import load_lemma_dict, save_lemma_dict, lemmatize_forms, lemma_count_table
+from word_counts import write_word_counts
+from vocab_growth import GrowthCurve, HyperLogLog, save_growth
+from instrumentation import Instrumentation, add_instrumentation_arguments, instrumentation_from_args
+
 OUTPUT_FILE = "fi_word_counts.csv"
 LANG_CODE = "fi"
+PROCESSES = 1
+BATCH_SIZE = 500
+CHECKPOINT_FILE = "fi_word_counts.ckpt"
+CHECKPOINT_EVERY = 50000
+LEMMA_CACHE_SIZE = 200000
 
 logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s', level=logging.INFO)
 
-def process_wiki_dump():
-    print(f"Rozpoczynam przetwarzanie: {INPUT_FILE}")
-    
-    wiki = WikiCorpus(INPUT_FILE, dictionary={})
-    
-    word_counts = Counter()
+def count_batch(texts):
+    form_counts = Counter()
     total_tokens = 0
-    
+    for text in texts:
+        form_counts.update(text)
+        total_tokens += len(text)
+    return form_counts, total_tokens
+
+def iter_batches(texts, batch_size):
+    texts = iter(texts)
+    while batch := list(itertools.islice(texts, batch_size)):
+        yield batch
+
+def iter_partial_counts(batches, processes):
+    if processes <= 1:
+        for batch in batches:
+            yield len(batch), count_batch(batch)
+        return
+
+    # Kolejka ograniczona do 2x liczby procesów, żeby nie wczytać całego zrzutu do RAM,
+    # a wyniki scalamy w kolejności artykułów (identyczny CSV jak w trybie 1 procesu).
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append((len(batch), pool.submit(count_batch, batch)))
+            if len(pending) >= 2 * processes:
+                size, future = pending.popleft()
+                yield size, future.result()
+        while pending:
+            size, future = pending.popleft()
+            yield size, future.result()
+
+def save_checkpoint(state, path=CHECKPOINT_FILE):
+    # Pickle + zlib, zapis do pliku tymczasowego i os.replace – przerwanie w trakcie zapisu nie psuje poprzedniego punktu.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    with open(path, "rb") as f:
+        return pickle.loads(zlib.decompress(f.read()))
+
+def save_word_counts(form_counts, total_tokens, lemma_dict=None, instr=None, growth=None):
+    instr = instr or Instrumentation("1_process_corpus")
+    print(f"Zakończono. Łącznie tokenów: {total_tokens}")
+    print(f"Unikalnych form wyrazowych: {len(form_counts)}")
+
+    # Lematyzujemy każdą formę tylko raz (a formy znane z poprzednich uruchomień wcale).
+    if lemma_dict is None:
+        lemma_dict = load_lemma_dict()
+    with instr.stage("lemmatize", len(form_counts)):
+        calls = lemmatize_forms(form_counts, lemma_dict, lang=LANG_CODE)
+    instr.count("lemmatizer_calls", calls)
+    print(f"Wywołań lematyzatora: {calls}")
+    with instr.stage("save"):
+        save_lemma_dict(lemma_dict)
+
+    with instr.stage("aggregate", len(form_counts)):
+        lemmas, counts = lemma_count_table(form_counts, lemma_dict)
+    print(f"Unikalnych słów (types): {len(lemmas)}")
+
+    with instr.stage("save", len(lemmas)):
+        df = pd.DataFrame({'word': lemmas, 'count': counts})
+        write_word_counts(df, OUTPUT_FILE)
+    print(f"Zapisano wyniki do {OUTPUT_FILE}")
+
+    if growth is not None:
+        with instr.stage("growth", len(growth.samples)):
+            save_growth(growth, form_counts, lemma_dict)
+
+class WordCountConsumer:
+    done = False
+
+    def __init__(self, lemma_dict=None):
+        self.lemma_dict = lemma_dict
+        self.form_counts = Counter()
+        self.total_tokens = 0
+
+    def consume(self, text, article_id=None):
+        self.form_counts.update(text)
+        self.total_tokens += len(text)
+
+    def finish(self):
+        save_word_counts(self.form_counts, self.total_tokens, self.lemma_dict)
+
+def process_wiki_dump_sketch(source="wiki", input_file=None, epsilon=SKETCH_EPSILON, delta=SKETCH_DELTA, top_k=TOP_K,
+                             instr=None):
+    instr = instr or Instrumentation("1_process_corpus")
+    # Tryb o ograniczonej pamięci: zamiast pełnego Countera szkic count-min + top-k lematów.
+    input_file = input_file or DEFAULT_PATHS[source]
+    print(f"Rozpoczynam przetwarzanie (szkic): {input_file} (epsilon={epsilon}, delta={delta}, top-k={top_k})")
+
+    wiki = open_corpus(source, input_file)
+    counter = SketchCounter(epsilon, delta, top_k)
+    # Bez pełnego Countera liczby różnych form i lematów szacuje HyperLogLog.
+    growth, form_types, lemma_types = GrowthCurve(), HyperLogLog(), HyperLogLog()
+    lemma_of = lru_cache(maxsize=LEMMA_CACHE_SIZE)(lambda form: lemmatize(form, lang=LANG_CODE))
+
     start_time = time.time()
-    
-    for i, text in enumerate(wiki.get_texts()):
-        lemmatized_tokens = []
-        for token in text:
-            lemma = lemmatize(token, lang=LANG_CODE)
-            lemmatized_tokens.append(lemma)
-            
-        word_counts.update(lemmatized_tokens)
-        total_tokens += len(lemmatized_tokens)
-        
+
+    for i, text in enumerate(instr.iterate("corpus", wiki.get_texts(), first_article=0)):
+        instr.count("articles")
+        instr.count("tokens", len(text))
+        with instr.stage("lemmatize", len(text)):
+            lemma_counts = Counter()
+            for form, count in Counter(text).items():
+                lemma_counts[lemma_of(form)] += count
+        with instr.stage("sketch", len(lemma_counts)):
+            counter.update(lemma_counts)
+        with instr.stage("growth", len(lemma_counts)):
+            form_types.add(set(text))
+            lemma_types.add(lemma_counts)
+            if growth.due(counter.sketch.total):
+                growth.record(counter.sketch.total, form_types.estimate(), lemma_types.estimate())
+
         if i % 1000 == 0:
             elapsed = time.time() - start_time
-            print(f"Przetworzono {i} artykułów. Tokenów: {total_tokens}. Czas: {elapsed:.0f}s")
-            
-    print(f"Zakończono. Łącznie tokenów: {total_tokens}")
-    print(f"Unikalnych słów (types): {len(word_counts)}")
-    
-    df = pd.DataFrame(word_counts.most_common(), columns=['word', 'count'])
-    df.to_csv(OUTPUT_FILE, index=False)
-    print(f"Zapisano wyniki do {OUTPUT_FILE}")
+            print(f"Przetworzono {i} artykułów. Tokenów: {counter.sketch.total}. Czas: {elapsed:.0f}s")
+
+    print(f"Zakończono. Łącznie tokenów: {counter.sketch.total}")
+    print(f"Szkic: {counter.sketch.depth} x {counter.sketch.width}, "
+          f"maksymalny błąd oszacowania ~{counter.sketch.error_bound():.0f} (z p-stwem {1 - delta})")
+
+    with instr.stage("save"):
+        df = pd.DataFrame(counter.most_common(), columns=['word', 'count'])
+        write_word_counts(df, OUTPUT_FILE)
+    print(f"Zapisano {len(df)} najczęstszych słów do {OUTPUT_FILE}")
+
+    growth.record(counter.sketch.total, form_types.estimate(), lemma_types.estimate())
+    with instr.stage("growth", len(growth.samples)):
+        save_growth(growth, method="HyperLogLog")
+
+def process_wiki_dump_incremental(processes=PROCESSES, source="wiki", input_file=None,
+                                  store_path=INCREMENTAL_STORE_FILE, instr=None):
+    # Tylko strony nowe lub ze zmienioną rewizją są tokenizowane; reszta pochodzi z magazynu wkładów.
+    instr = instr or Instrumentation("1_process_corpus")
+    if source not in ("wiki", "multistream"):
+        raise ValueError("Tryb przyrostowy wymaga zrzutu XML (--source wiki lub multistream)")
+    input_file = input_file or DEFAULT_PATHS[source]
+    print(f"Aktualizacja przyrostowa: {input_file} (magazyn: {store_path}, procesy: {processes})")
+
+    form_counts = update_counts(input_file, processes, store_path, instr)
+    total_tokens = sum(form_counts.values())
+    instr.count("tokens", total_tokens)
+    save_word_counts(form_counts, total_tokens, instr=instr)
+
+def process_wiki_dump(processes=PROCESSES, batch_size=BATCH_SIZE, source="wiki", input_file=None,
+                      checkpoint_every=CHECKPOINT_EVERY, resume=False, instr=None):
+    instr = instr or Instrumentation("1_process_corpus")
+    input_file = input_file or DEFAULT_PATHS[source]
+    print(f"Rozpoczynam przetwarzanie: {input_file} (źródło: {source}, procesy: {processes})")
+
+    wiki = open_corpus(source, input_file)
+
+    if source == "store":
+        # Magazyn tokenów: liczności form to jeden np.bincount po tablicy identyfikatorów.
+        with instr.stage("count", len(wiki)):
+            form_counts = wiki.form_counts()
+        instr.count("articles", len(wiki))
+        instr.count("tokens", sum(form_counts.values()))
+        save_word_counts(form_counts, sum(form_counts.values()), instr=instr)
+        return
+
+    form_counts = Counter()
+    total_tokens = 0
+    articles = 0
+    position = None
+    growth = GrowthCurve()
+
+    if resume and os.path.exists(CHECKPOINT_FILE):
+        state = load_checkpoint()
+        if (state["source"], state["input_file"]) != (source, input_file):
+            raise ValueError(f"Punkt kontrolny dotyczy {state['input_file']} ({state['source']}), nie {input_file} ({source})")
+        form_counts, total_tokens, articles, position = (
+            state["form_counts"], state["total_tokens"], state["articles"], state["resume_point"])
+        growth = state.get("growth") or growth
+        print(f"Wznawiam od punktu kontrolnego: {articles} artykułów, {total_tokens} tokenów")
+    elif resume:
+        print(f"Brak pliku {CHECKPOINT_FILE} – zaczynam od początku.")
+
+    start_time = time.time()
+
+    # Etapy mają czas własny: "corpus" (WikiCorpus: dekompresja, XML, usuwanie znaczników, tokenizacja),
+    # "count" (zliczanie paczek lub oczekiwanie na procesy robocze), "merge" (scalanie Counterów).
+    texts = instr.iterate("corpus", get_texts_from(wiki, articles, position), first_article=articles)
+    partials = instr.iterate("count", iter_partial_counts(iter_batches(texts, batch_size), processes))
+    for size, (partial_counts, partial_tokens) in partials:
+        with instr.stage("merge", size):
+            form_counts.update(partial_counts)
+        total_tokens += partial_tokens
+        instr.count("articles", size)
+        instr.count("tokens", partial_tokens)
+        # Pełny Counter daje dokładną liczbę form po każdej paczce; lematy uzupełniamy na końcu.
+        if growth.due(total_tokens):
+            growth.record(total_tokens, len(form_counts))
+
+        if articles // 1000 != (articles + size) // 1000 or articles == 0:
+            elapsed = time.time() - start_time
+            print(f"Przetworzono {articles + size} artykułów. Tokenów: {total_tokens}. Czas: {elapsed:.0f}s")
+        if checkpoint_every and articles // checkpoint_every != (articles + size) // checkpoint_every:
+            with instr.stage("checkpoint"):
+                save_checkpoint({
+                    "source": source,
+                    "input_file": input_file,
+                    "articles": articles + size,
+                    "total_tokens": total_tokens,
+                    "resume_point": resume_point(wiki, articles + size),
+                    "form_counts": form_counts,
+                    "growth": growth,
+                })
+            print(f"Zapisano punkt kontrolny: {articles + size} artykułów")
+        articles += size
+
+    growth.record(total_tokens, len(form_counts))
+    save_word_counts(form_counts, total_tokens, instr=instr, growth=growth)
+    if os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
 
 if __name__ == "__main__":
-    process_wiki_dump()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Lematyzacja i zliczanie słów z fińskiej Wikipedii")
+    parser.add_argument("--processes", type=int, default=PROCESSES,
+                        help="liczba procesów zliczających (1 = tryb jednoprocesowy)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="liczba artykułów w jednej paczce dla procesu roboczego")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY,
+                        help=f"co ile artykułów zapisywać punkt kontrolny do {CHECKPOINT_FILE} (0 = wyłączone)")
+    parser.add_argument("--resume", action="store_true",
+                        help="wznów od ostatniego punktu kontrolnego")
+    parser.add_argument("--sketch", action="store_true",
+                        help="tryb o ograniczonej pamięci: count-min sketch + top-k zamiast pełnego Countera")
+    parser.add_argument("--sketch-epsilon", type=float, default=SKETCH_EPSILON,
+                        help="względny błąd szkicu (błąd <= epsilon * liczba tokenów)")
+    parser.add_argument("--sketch-delta", type=float, default=SKETCH_DELTA,
+                        help="prawdopodobieństwo przekroczenia błędu")
+    parser.add_argument("--top-k", type=int, default=TOP_K,
+                        help="liczba najczęstszych lematów zapisywanych w trybie --sketch")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"aktualizacja przyrostowa: przetwarzaj tylko strony nowe i zmienione "
+                             f"(odciski i wkłady stron w {INCREMENTAL_STORE_FILE})")
+    add_source_arguments(parser)
+    add_instrumentation_arguments(parser, "1_process_corpus")
+    args = parser.parse_args()
+    instr = instrumentation_from_args("1_process_corpus", args)
+    if args.sketch:
+        process_wiki_dump_sketch(source=args.source, input_file=args.input, epsilon=args.sketch_epsilon,
+                                 delta=args.sketch_delta, top_k=args.top_k, instr=instr)
+    elif args.incremental:
+        process_wiki_dump_incremental(processes=args.processes, source=args.source, input_file=args.input,
+                                      instr=instr)
+    else:
+        process_wiki_dump(processes=args.processes, batch_size=args.batch_size,
+                          source=args.source, input_file=args.input,
+                          checkpoint_every=args.checkpoint_every, resume=args.resume, instr=instr)
+    instr.finish()
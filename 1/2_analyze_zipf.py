@@ -1,49 +1,214 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+from scipy.optimize import minimize
+
+from instrumentation import Instrumentation, add_instrumentation_arguments, instrumentation_from_args
+from word_counts import read_word_counts
+
+INPUT_FILE = "fi_word_counts.csv"
+OUTPUT_COVERAGE_CSV = "fi_coverage_stats.csv"
+OUTPUT_FIT_CSV = "fi_zipf_fit.csv"
+THRESHOLDS = [0.5, 0.8, 0.9, 0.95, 0.99]
+BOOTSTRAP_SAMPLES = 100
+BOOTSTRAP_SEED = 42
+PLOT_MODE = "binned"
+PLOT_EXACT_HEAD = 1000
+PLOT_BINS = 200
+
+def log_binned(counts, head=PLOT_EXACT_HEAD, bins=PLOT_BINS):
+    """Dokładne punkty dla pierwszych `head` rang, dalej średnie częstości w przedziałach logarytmicznych rang."""
+    counts = np.asarray(counts, dtype=float)
+    head = min(head, len(counts))
+    ranks = np.arange(1, head + 1, dtype=float)
+    values = counts[:head]
+    if head == len(counts):
+        return ranks, values
+
+    # Krawędzie przedziałów (indeksy od 0) rozłożone geometrycznie od końca „głowy” do ostatniej rangi.
+    edges = np.unique(np.geomspace(head, len(counts), bins + 1).astype(np.int64))
+    starts, stops = edges[:-1], edges[1:]
+    sums = np.add.reduceat(counts, starts)
+    bin_ranks = np.sqrt((starts + 1) * stops.astype(float))
+    return np.concatenate([ranks, bin_ranks]), np.concatenate([values, sums / (stops - starts)])
+
+def zipf_norm(n, s, head=PLOT_EXACT_HEAD):
+    """sum_{k=1..n} k^-s: dokładnie dla pierwszych `head` wyrazów, resztę przybliża wzór Eulera–Maclaurina."""
+    k = np.arange(1, min(head, n) + 1, dtype=float)
+    total = np.sum(k ** -s)
+    if n <= head:
+        return total
+    a, b = head + 1.0, float(n)
+    integral = np.log(b / a) if s == 1 else (b ** (1 - s) - a ** (1 - s)) / (1 - s)
+    return total + integral + (a ** -s + b ** -s) / 2 + s * (a ** (-s - 1) - b ** (-s - 1)) / 12
+
+def zipf_expected(counts, s, ranks):
+    # Oczekiwana częstość rangi r w dopasowanym rozkładzie Zipfa: N * r^-s / sum_k k^-s.
+    return np.sum(counts) * ranks ** -s / zipf_norm(len(counts), s)
 
-df = pd.read_csv("fi_word_counts.csv")
-
-df['rank'] = df.index + 1
-
-plt.figure(figsize=(10, 6))
-plt.loglog(df['rank'], df['count'], marker='.', linestyle='none', markersize=2, alpha=0.5)
-plt.title('Prawo Zipfa - Korpus Fiński')
-plt.xlabel('Ranga (skala log)')
-plt.ylabel('Częstotliwość (skala log)')
-plt.grid(True, which="both", ls="-", alpha=0.2)
-plt.savefig('zipf_finnish.png')
-print("Wykres Zipfa zapisano jako 'zipf_finnish.png'")
-
-total_tokens = df['count'].sum()
-df['cumulative_percent'] = df['count'].cumsum() / total_tokens
-
-thresholds = [0.5, 0.8, 0.9, 0.95, 0.99]
-
-print("\n--- POKRYCIE TEKSTU ---")
-print(f"Całkowita liczba tokenów: {total_tokens}")
-print(f"Całkowita liczba unikalnych słów: {len(df)}")
-
-coverage_data = []
-
-for t in thresholds:
-    try:
-        count_needed = df[df['cumulative_percent'] >= t].index[0] + 1
-    except IndexError:
-        count_needed = len(df)
-        
-    percent_vocab = (count_needed / len(df)) * 100
-    
-    print(f"Aby zrozumieć {t*100}% tekstu, trzeba znać {count_needed} słów ({percent_vocab:.2f}% słownictwa).")
-    
-    coverage_data.append({
-        "Pokrycie_tekstu": f"{t*100:.0f}%",
+def plot_zipf(counts, fit=None, mode=PLOT_MODE):
+    plt.figure(figsize=(10, 6))
+    if mode == "full":
+        ranks, values = np.arange(1, len(counts) + 1), counts
+        plt.loglog(ranks, values, marker='.', linestyle='none', markersize=2, alpha=0.5)
+    else:
+        ranks, values = log_binned(counts)
+        plt.loglog(ranks, values, marker='.', linestyle='none', markersize=4, alpha=0.7,
+                   label=f'Dane (pierwsze {PLOT_EXACT_HEAD} rang dokładnie, dalej przedziały log.)')
+    if fit is not None:
+        line_ranks = np.geomspace(1, len(counts), 200)
+        plt.loglog(line_ranks, zipf_expected(counts, fit['zipf_s'], line_ranks), color='red', linewidth=1.5,
+                   label=f"Zipf MLE, s = {fit['zipf_s']:.3f}")
+        plt.legend(loc='upper right')
+    plt.title('Prawo Zipfa - Korpus Fiński')
+    plt.xlabel('Ranga (skala log)')
+    plt.ylabel('Częstotliwość (skala log)')
+    plt.grid(True, which="both", ls="-", alpha=0.2)
+    plt.savefig('zipf_finnish.png')
+    print("Wykres Zipfa zapisano jako 'zipf_finnish.png'")
+
+def coverage_table(counts, thresholds):
+    # Jedna suma skumulowana + searchsorted zamiast pełnego skanu ramki dla każdego progu.
+    total_tokens = counts.sum()
+    cumulative_percent = np.cumsum(counts) / total_tokens
+    thresholds = np.asarray(thresholds, dtype=float)
+    first_index = np.searchsorted(cumulative_percent, thresholds, side='left')
+    count_needed = np.minimum(first_index + 1, len(counts))
+
+    return pd.DataFrame({
+        "Pokrycie_tekstu": [f"{t*100:g}%" for t in thresholds],
         "Wymagana_liczba_slow": count_needed,
-        "Procent_slownictwa": round(percent_vocab, 4)
+        "Procent_slownictwa": np.round(count_needed / len(counts) * 100, 4),
     })
 
-output_csv = "fi_coverage_stats.csv"
-df_coverage = pd.DataFrame(coverage_data)
-df_coverage.to_csv(output_csv, index=False)
+def zipf_nll(params, log_ranks, counts):
+    s, = params
+    log_norm = np.logaddexp.reduce(-s * log_ranks)
+    return (s * np.dot(counts, log_ranks) + counts.sum() * log_norm) / counts.sum()
+
+def mandelbrot_nll(params, ranks, counts):
+    s, q = params
+    log_shifted = np.log(ranks + q)
+    log_norm = np.logaddexp.reduce(-s * log_shifted)
+    return (s * np.dot(counts, log_shifted) + counts.sum() * log_norm) / counts.sum()
+
+def fit_zipf(counts):
+    """Estymatory największej wiarygodności: Zipf (s) i Zipf–Mandelbrot (s, q) dla danych ranga–częstość."""
+    counts = np.asarray(counts, dtype=float)
+    ranks = np.arange(1, len(counts) + 1, dtype=float)
+    log_ranks = np.log(ranks)
+
+    zipf = minimize(zipf_nll, x0=[1.0], args=(log_ranks, counts), method='L-BFGS-B', bounds=[(0.01, 10.0)])
+    mandelbrot = minimize(mandelbrot_nll, x0=[zipf.x[0], 1.0], args=(ranks, counts), method='L-BFGS-B',
+                          bounds=[(0.01, 10.0), (-0.99, 1e4)])
+    return {
+        "zipf_s": zipf.x[0],
+        "zipf_loglik": -zipf.fun * counts.sum(),
+        "mandelbrot_s": mandelbrot.x[0],
+        "mandelbrot_q": mandelbrot.x[1],
+        "mandelbrot_loglik": -mandelbrot.fun * counts.sum(),
+    }
+
+_bootstrap_probs = None
+_bootstrap_total = None
+
+def _init_bootstrap(counts):
+    global _bootstrap_probs, _bootstrap_total
+    _bootstrap_total = int(counts.sum())
+    _bootstrap_probs = counts / counts.sum()
+
+def _bootstrap_fit(seed):
+    # Próba bootstrapowa: losowanie tokenów z rozkładu empirycznego, ponowne rangowanie i dopasowanie.
+    rng = np.random.default_rng(seed)
+    sample = rng.multinomial(_bootstrap_total, _bootstrap_probs)
+    sample = np.sort(sample[sample > 0])[::-1]
+    return fit_zipf(sample)
+
+def bootstrap_fit(counts, samples=BOOTSTRAP_SAMPLES, processes=None, seed=BOOTSTRAP_SEED):
+    seeds = np.random.SeedSequence(seed).generate_state(samples)
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_bootstrap,
+                             initargs=(np.asarray(counts, dtype=float),)) as pool:
+        return pd.DataFrame(list(pool.map(_bootstrap_fit, seeds.tolist())))
+
+def fit_table(fit, boot):
+    rows = [
+        ("Zipf", "s", "zipf_s", "zipf_loglik"),
+        ("Zipf-Mandelbrot", "s", "mandelbrot_s", "mandelbrot_loglik"),
+        ("Zipf-Mandelbrot", "q", "mandelbrot_q", "mandelbrot_loglik"),
+    ]
+    data = []
+    for model, param, key, loglik in rows:
+        low, high = np.percentile(boot[key], [2.5, 97.5]) if len(boot) else (np.nan, np.nan)
+        data.append({
+            "Model": model,
+            "Parametr": param,
+            "Estymacja": round(fit[key], 6),
+            "CI95_dolny": round(low, 6),
+            "CI95_gorny": round(high, 6),
+            "Log_wiarygodnosc": round(fit[loglik], 2),
+        })
+    return pd.DataFrame(data)
+
+def parse_thresholds(value):
+    # "0.5,0.8,0.9" albo zakres "start:stop:krok", np. "0.5:0.99:0.01" (koniec włącznie).
+    if ":" in value:
+        start, stop, step = (float(x) for x in value.split(":"))
+        return list(np.round(np.arange(start, stop + step / 2, step), 10))
+    return [float(x) for x in value.split(",")]
+
+def main(thresholds=THRESHOLDS, bootstrap_samples=BOOTSTRAP_SAMPLES, processes=None, plot_mode=PLOT_MODE,
+         instr=None):
+    instr = instr or Instrumentation("2_analyze_zipf")
+    # Wystarczy kolumna liczności – z Parquet czytamy tylko ją.
+    with instr.stage("load"):
+        df = read_word_counts(INPUT_FILE, columns=['count'])
+
+    counts = df['count'].to_numpy()
+    total_tokens = counts.sum()
+
+    print("\n--- POKRYCIE TEKSTU ---")
+    print(f"Całkowita liczba tokenów: {total_tokens}")
+    print(f"Całkowita liczba unikalnych słów: {len(df)}")
+
+    with instr.stage("coverage", len(thresholds)):
+        df_coverage = coverage_table(counts, thresholds)
+    for t, (_, row) in zip(thresholds, df_coverage.iterrows()):
+        print(f"Aby zrozumieć {t*100:g}% tekstu, trzeba znać {row['Wymagana_liczba_slow']} słów ({row['Procent_slownictwa']:.2f}% słownictwa).")
+
+    df_coverage.to_csv(OUTPUT_COVERAGE_CSV, index=False)
+    print(f"\nZapisano tabelę pokrycia do pliku: {OUTPUT_COVERAGE_CSV}")
+
+    print("\n--- DOPASOWANIE ZIPF / ZIPF-MANDELBROT (MLE) ---")
+    with instr.stage("fit", len(counts)):
+        fit = fit_zipf(counts)
+    with instr.stage("bootstrap", bootstrap_samples):
+        boot = bootstrap_fit(counts, bootstrap_samples, processes) if bootstrap_samples else pd.DataFrame()
+    df_fit = fit_table(fit, boot)
+    print(df_fit.to_string(index=False))
+
+    df_fit.to_csv(OUTPUT_FIT_CSV, index=False)
+    print(f"\nZapisano parametry dopasowania do pliku: {OUTPUT_FIT_CSV}")
+
+    with instr.stage("plot"):
+        plot_zipf(counts, fit, plot_mode)
 
-print(f"\nZapisano tabelę pokrycia do pliku: {output_csv}")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prawo Zipfa i pokrycie tekstu dla korpusu fińskiego")
+    parser.add_argument("--thresholds", type=parse_thresholds, default=THRESHOLDS,
+                        help="progi pokrycia: lista '0.5,0.9' lub zakres 'start:stop:krok'")
+    parser.add_argument("--bootstrap", type=int, default=BOOTSTRAP_SAMPLES,
+                        help="liczba prób bootstrapowych dla przedziałów ufności (0 = bez bootstrapu)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="liczba procesów dla bootstrapu")
+    parser.add_argument("--plot", choices=("binned", "full"), default=PLOT_MODE,
+                        help="wykres: przedziały logarytmiczne rang (binned) albo każda ranga osobno (full)")
+    add_instrumentation_arguments(parser, "2_analyze_zipf", profile=False)
+    args = parser.parse_args()
+    instr = instrumentation_from_args("2_analyze_zipf", args)
+    main(thresholds=args.thresholds, bootstrap_samples=args.bootstrap, processes=args.processes,
+         plot_mode=args.plot, instr=instr)
+    instr.finish()
@@ -1,51 +1,198 @@
 import stanza
 import pandas as pd
-from gensim.corpora import WikiCorpus
+import argparse
 import logging
+import time
+
+from annotation_cache import AnnotationCache, ANNOTATION_CACHE_FILE
+from corpus_sources import open_corpus, add_source_arguments
+from instrumentation import Instrumentation, add_instrumentation_arguments, instrumentation_from_args
+from lemma_dict import load_lemma_dict, get_lemma
+
+OUTPUT_FILE = "fi_top_nouns.csv"
+TARGET_SENTENCES = 5000
+TOP_N_NOUNS = 50
+MAX_ARTICLE_TOKENS = 200
+BATCH_SIZE = 64
+NOUN_UPOS = ('NOUN', 'PROPN')
 
 logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s', level=logging.INFO)
 
-def main():
+def load_pipeline(pretokenized=False):
     print("Sprawdzanie modelu Stanza dla języka fińskiego...")
     stanza.download('fi')
-    
-    nlp = stanza.Pipeline('fi', processors='tokenize,mwt,pos,lemma', use_gpu=False, verbose=False)
-
-    INPUT_FILE = "fiwiki-latest-pages-articles.xml.bz2"
-    wiki = WikiCorpus(INPUT_FILE, dictionary={}, processes=1)
-
-    noun_counts = {}
-    processed_sentences = 0
-    TARGET_SENTENCES = 5000 
-
-    for i, text in enumerate(wiki.get_texts()):
-        if not text: continue
-        
-        raw_text = " ".join(text[:200])
-        
-        doc = nlp(raw_text)
-        
-        for sent in doc.sentences:
-            for word in sent.words:
-                if word.upos in ['NOUN', 'PROPN']:
-                    lemma = word.lemma
-                    if lemma:
-                        noun_counts[lemma] = noun_counts.get(lemma, 0) + 1
-            
-            processed_sentences += 1
-        
-        if processed_sentences >= TARGET_SENTENCES:
-            break
-        
+
+    if pretokenized:
+        # WikiCorpus już stokenizował tekst – pomijamy tokenizer neuronowy i mwt.
+        return stanza.Pipeline('fi', processors='tokenize,pos,lemma', tokenize_pretokenized=True,
+                               use_gpu=False, verbose=False)
+    return stanza.Pipeline('fi', processors='tokenize,mwt,pos,lemma', use_gpu=False, verbose=False)
+
+def model_version(pretokenized=False, source="wiki"):
+    # Anotacje zależą od wersji modeli, trybu tokenizacji, długości fragmentu artykułu
+    # i tokenizatora źródła (stream tokenizuje inaczej niż WikiCorpus).
+    mode = "pretok" if pretokenized else "text"
+    version = f"stanza-{stanza.__resources_version__}-fi-{mode}-{MAX_ARTICLE_TOKENS}"
+    return version + "-stream" if source == "stream" else version
+
+class NounConsumer:
+    def __init__(self, nlp=None, lemma_dict=None, pretokenized=False, batch_size=BATCH_SIZE,
+                 target_sentences=TARGET_SENTENCES, upos=NOUN_UPOS, top_n=TOP_N_NOUNS, cache=None):
+        self.pretokenized = pretokenized
+        self.batch_size = batch_size
+        self.target_sentences = target_sentences
+        self.upos = set(upos)
+        self.top_n = top_n
+        self.cache = cache
+        self._nlp = nlp
+        self.lemma_dict = load_lemma_dict() if lemma_dict is None else lemma_dict
+        self.noun_counts = {}
+        self.processed_sentences = 0
+        self.articles = 0
+        self.pending = []
+        self.pending_ids = []
+        self.tagging_time = 0.0
+
+    @property
+    def nlp(self):
+        # Model ładujemy dopiero, gdy jakiegoś artykułu nie ma w cache.
+        if self._nlp is None:
+            self._nlp = load_pipeline(self.pretokenized)
+        return self._nlp
+
+    @property
+    def done(self):
+        return self.processed_sentences >= self.target_sentences
+
+    def consume(self, text, article_id=None):
+        i = self.articles
+        self.articles += 1
+        if not text: return
+
+        if self.cache is not None and article_id is not None:
+            sentences = self.cache.get(article_id)
+            if sentences is not None:
+                self.count_nouns(sentences)
+                return
+
+        if self.pretokenized:
+            # Jedno zdanie na artykuł (jak w trybie tekstowym bez interpunkcji), wiele artykułów na wywołanie.
+            self.pending.append(text[:MAX_ARTICLE_TOKENS])
+            self.pending_ids.append(article_id)
+            if len(self.pending) >= self.batch_size or \
+                    self.processed_sentences + len(self.pending) >= self.target_sentences:
+                self.flush()
+            return
+
+        raw_text = " ".join(text[:MAX_ARTICLE_TOKENS])
+
+        start = time.time()
+        doc = self.nlp(raw_text)
+        self.tagging_time += time.time() - start
+        sentences = self.annotations(doc.sentences)
+        self.store(article_id, sentences)
+        self.count_nouns(sentences)
+
         if i % 10 == 0:
-            print(f"Przetworzono artykułów: {i}, Zdań: {processed_sentences}")
+            print(f"Przetworzono artykułów: {i}, Zdań: {self.processed_sentences}")
 
-    df_nouns = pd.DataFrame(list(noun_counts.items()), columns=['lemma', 'count'])
-    df_nouns = df_nouns.sort_values('count', ascending=False).head(50)
-    df_nouns.to_csv("fi_top_nouns.csv", index=False)
+    def flush(self):
+        if not self.pending: return
+
+        start = time.time()
+        doc = self.nlp(self.pending)
+        self.tagging_time += time.time() - start
+        for article_id, sent in zip(self.pending_ids, doc.sentences):
+            sentences = self.annotations([sent])
+            self.store(article_id, sentences)
+            self.count_nouns(sentences)
+        self.pending, self.pending_ids = [], []
+        if self.cache is not None:
+            self.cache.commit()
+
+        print(f"Przetworzono artykułów: {self.articles}, Zdań: {self.processed_sentences}, "
+              f"{self.sentences_per_second():.1f} zdań/s")
+
+    def sentences_per_second(self):
+        return self.processed_sentences / self.tagging_time if self.tagging_time else 0.0
+
+    def annotations(self, sentences):
+        # (lemat, UPOS) dla każdego słowa; brakujący lemat Stanzy uzupełnia słownik lematów.
+        return [
+            [(word.lemma or get_lemma(self.lemma_dict, word.text.lower()), word.upos) for word in sent.words]
+            for sent in sentences
+        ]
+
+    def store(self, article_id, sentences):
+        if self.cache is not None and article_id is not None:
+            self.cache.put(article_id, sentences)
+
+    def count_nouns(self, sentences):
+        for sent in sentences:
+            for lemma, upos in sent:
+                if upos in self.upos and lemma:
+                    self.noun_counts[lemma] = self.noun_counts.get(lemma, 0) + 1
+
+            self.processed_sentences += 1
+
+    def finish(self):
+        self.flush()
+        print(f"Otagowano {self.processed_sentences} zdań w {self.tagging_time:.1f}s "
+              f"({self.sentences_per_second():.1f} zdań/s)")
+        if self.cache is not None:
+            print(f"Cache anotacji: {self.cache.hits} trafień, {self.cache.misses} chybień")
+            self.cache.close()
+
+        df_nouns = pd.DataFrame(list(self.noun_counts.items()), columns=['lemma', 'count'])
+        df_nouns = df_nouns.sort_values('count', ascending=False).head(self.top_n)
+        df_nouns.to_csv(OUTPUT_FILE, index=False)
+
+        print("\n--- TOP 10 RZECZOWNIKÓW FIŃSKICH ---")
+        print(df_nouns.head(10))
+
+def main(source="wiki", input_file=None, pretokenized=False, batch_size=BATCH_SIZE,
+         target_sentences=TARGET_SENTENCES, upos=NOUN_UPOS, top_n=TOP_N_NOUNS, use_cache=True, instr=None):
+    instr = instr or Instrumentation("3_extract_nouns")
+    cache = AnnotationCache(model_version(pretokenized, source)) if use_cache else None
+    consumer = NounConsumer(pretokenized=pretokenized, batch_size=batch_size,
+                            target_sentences=target_sentences, upos=upos, top_n=top_n, cache=cache)
+
+    wiki = open_corpus(source, input_file, processes=1, metadata=True)
+
+    for text, (pageid, _) in instr.iterate("corpus", wiki.get_texts(), first_article=0):
+        with instr.stage("tag", len(text)):
+            consumer.consume(text, pageid)
+        if consumer.done:
+            break
 
-    print("\n--- TOP 10 RZECZOWNIKÓW FIŃSKICH ---")
-    print(df_nouns.head(10))
+    with instr.stage("tag"):
+        consumer.flush()
+    instr.count("sentences", consumer.processed_sentences)
+    if cache is not None:
+        instr.count("cache_hits", cache.hits)
+        instr.count("cache_misses", cache.misses)
+    with instr.stage("save"):
+        consumer.finish()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Ekstrakcja najczęstszych rzeczowników (Stanza POS)")
+    parser.add_argument("--pretokenized", action="store_true",
+                        help="przekazuj do Stanzy gotowe tokeny WikiCorpus, wiele artykułów na wywołanie")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="liczba artykułów w jednym wywołaniu Stanzy (tryb --pretokenized)")
+    parser.add_argument("--target-sentences", type=int, default=TARGET_SENTENCES,
+                        help="liczba zdań do otagowania")
+    parser.add_argument("--upos", default=",".join(NOUN_UPOS),
+                        help="zliczane klasy UPOS oddzielone przecinkami")
+    parser.add_argument("--top-n", type=int, default=TOP_N_NOUNS,
+                        help="liczba lematów zapisywanych do pliku wynikowego")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"nie używaj cache anotacji {ANNOTATION_CACHE_FILE}")
+    add_source_arguments(parser)
+    add_instrumentation_arguments(parser, "3_extract_nouns")
+    args = parser.parse_args()
+    instr = instrumentation_from_args("3_extract_nouns", args)
+    main(source=args.source, input_file=args.input, pretokenized=args.pretokenized,
+         batch_size=args.batch_size, target_sentences=args.target_sentences,
+         upos=args.upos.split(","), top_n=args.top_n, use_cache=not args.no_cache, instr=instr)
+    instr.finish()
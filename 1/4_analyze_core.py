@@ -1,16 +1,28 @@
 import pandas as pd
-import networkx as nx
 import matplotlib.pyplot as plt
-from gensim.corpora import WikiCorpus
+import argparse
 import itertools
 import logging
-import math
 
-INPUT_CORPUS = "fiwiki-latest-pages-articles.xml.bz2"
+import numpy as np
+from matplotlib.collections import LineCollection
+
+from core_graph import CoreGraph, MIN_COOCCURRENCE
+from cooccurrence import CoreIndexer, CooccurrenceCounter, count_parallel, parse_window
+from corpus_sources import DEFAULT_PATHS, open_corpus, add_source_arguments
+from graph_layout import LAYOUT_CACHE_FILE, cached_layout, optimal_k
+from instrumentation import Instrumentation, add_instrumentation_arguments, instrumentation_from_args
+from lemma_dict import load_lemma_dict, save_lemma_dict
+from word_counts import read_word_counts
+
 INPUT_COUNTS = "fi_word_counts.csv"
 OUTPUT_STATS_CSV = "fi_core_stats.csv"
 TOP_N_WORDS = 30
 LIMIT_ARTICLES = 10000
+WINDOW = "adjacent"
+OUTPUT_GRAPH_PNG = "fi_core_graph.png"
+PLOT_DPI = 300
+MAX_LABELS = 300
 
 FINNISH_STOPWORDS = {
     "olla", "ei", "ja", "se", "hän", "joka", "että", "tämä", "kuin", 
@@ -18,65 +30,106 @@ FINNISH_STOPWORDS = {
     "vain", "mukaan", "jos", "tulla", "jokin", "vuosi", "koko"
 }
 
-def analyze_core():
+def load_core_words(top_n=TOP_N_WORDS):
     print("1. Wczytywanie statystyk słów...")
     try:
-        df = pd.read_csv(INPUT_COUNTS)
+        df = read_word_counts(INPUT_COUNTS)
     except FileNotFoundError:
         print("BŁĄD: Nie znaleziono pliku fi_word_counts.csv. Uruchom najpierw skrypt 1!")
-        return
+        return None
 
     mask = (~df['word'].isin(FINNISH_STOPWORDS)) & (df['word'].str.len() > 2)
-    top_words_df = df[mask].head(TOP_N_WORDS)
+    top_words_df = df[mask].head(top_n)
     
-    top_words_set = set(top_words_df['word'].values)
-    print(f"Wybrane słowa do rdzenia: {top_words_set}")
+    top_words = list(top_words_df['word'].values)
+    if len(top_words) <= 50:
+        print(f"Wybrane słowa do rdzenia: {set(top_words)}")
+    else:
+        print(f"Wybrano {len(top_words)} słów do rdzenia, m.in.: {top_words[:20]}")
+    return top_words
 
-    G = nx.Graph()
-    G.add_nodes_from(top_words_set)
+class CooccurrenceConsumer:
+    def __init__(self, top_words, lemma_dict=None, window=WINDOW, limit_articles=LIMIT_ARTICLES,
+                 layout_cache=LAYOUT_CACHE_FILE):
+        self.top_words = top_words
+        self.layout_cache = layout_cache
+        self.limit_articles = limit_articles
+        self.lemma_dict = load_lemma_dict() if lemma_dict is None else lemma_dict
+        self.known_forms = len(self.lemma_dict)
+        self.indexer = CoreIndexer(top_words, self.lemma_dict)
+        self.counter = CooccurrenceCounter(len(top_words), window)
+        self.articles = 0
 
-    print(f"2. Skanowanie korpusu w poszukiwaniu powiązań (limit: {LIMIT_ARTICLES} art)...")
-    wiki = WikiCorpus(INPUT_CORPUS, dictionary={}, processes=1)
-    
-    pair_counts = {}
+    @property
+    def done(self):
+        return bool(self.limit_articles) and self.articles >= self.limit_articles
 
-    for i, text in enumerate(wiki.get_texts()):
-        if i >= LIMIT_ARTICLES:
+    def consume(self, text, article_id=None):
+        self.articles += 1
+        self.counter.add(self.indexer.ids(text))
+
+    def finish(self, instr=None):
+        if len(self.lemma_dict) > self.known_forms:
+            save_lemma_dict(self.lemma_dict)
+
+        build_core_graph(self.top_words, self.counter.result(), instr, self.layout_cache)
+
+def analyze_core(source="wiki", input_file=None, top_n=TOP_N_WORDS, window=WINDOW,
+                 limit_articles=LIMIT_ARTICLES, processes=1, instr=None,
+                 layout_cache=LAYOUT_CACHE_FILE):
+    instr = instr or Instrumentation("4_analyze_core")
+    with instr.stage("load"):
+        top_words = load_core_words(top_n)
+    if top_words is None:
+        return
+
+    limit = limit_articles or "cały korpus"
+    print(f"2. Skanowanie korpusu w poszukiwaniu powiązań (okno: {window}, limit: {limit} art)...")
+    wiki = open_corpus(source, input_file, processes=1)
+
+    if processes > 1:
+        store_prefix = (input_file or DEFAULT_PATHS[source]) if source == "store" else None
+        with instr.stage("count"):
+            matrix = count_parallel(wiki, top_words, window, limit_articles, processes, store_prefix=store_prefix,
+                                    instr=instr)
+        build_core_graph(top_words, matrix, instr, layout_cache)
+        return
+
+    consumer = CooccurrenceConsumer(top_words, window=window, limit_articles=limit_articles,
+                                    layout_cache=layout_cache)
+
+    for text in instr.iterate("corpus", wiki.get_texts(), first_article=0):
+        if consumer.done:
             break
-            
-        filtered_tokens = [token for token in text if token in top_words_set]
-        
-        for w1, w2 in zip(filtered_tokens, filtered_tokens[1:]):
-            if w1 == w2: continue 
-            pair = tuple(sorted((w1, w2)))
-            pair_counts[pair] = pair_counts.get(pair, 0) + 1
+        with instr.stage("count", len(text)):
+            consumer.consume(text)
+        instr.count("tokens", len(text))
+    instr.count("articles", consumer.articles)
+
+    consumer.finish(instr)
 
+def build_core_graph(top_words, matrix, instr=None, layout_cache=LAYOUT_CACHE_FILE):
+    instr = instr or Instrumentation("4_analyze_core")
     print("3. Budowanie grafu...")
-    MIN_COOCCURRENCE = 5
-    for (w1, w2), count in pair_counts.items():
-        if count >= MIN_COOCCURRENCE:
-            G.add_edge(w1, w2, weight=count)
+    with instr.stage("graph"):
+        graph = CoreGraph(top_words, matrix, min_weight=MIN_COOCCURRENCE)
+    print(f"Graf: {graph.n} wierzchołków, {graph.number_of_edges()} krawędzi")
 
     print("3a. Obliczanie miar centralności i zapis do pliku...")
-    
-    degree_dict = dict(G.degree())
-    
-    norm_centrality = nx.degree_centrality(G)
-    
-    stats_data = []
-    for word in G.nodes():
-        deg = degree_dict.get(word, 0)
-        norm = norm_centrality.get(word, 0.0)
-        
-        stats_data.append({
-            "Słowo": word,
-            "Liczba_sasiadow": deg,
-            "Centralnosc_norm": round(norm, 4)
+    degree = graph.degree()
+
+    with instr.stage("centrality", graph.number_of_edges()):
+        df_stats = pd.DataFrame({
+            "Słowo": top_words,
+            "Liczba_sasiadow": degree,
+            "Centralnosc_norm": np.round(graph.degree_centrality(), 4),
+            "Stopien_wazony": graph.weighted_degree(),
+            "PageRank": np.round(graph.pagerank(), 6),
+            "Centralnosc_wlasna": np.round(graph.eigenvector_centrality(), 6),
+            "K_rdzen": graph.core_numbers(),
         })
     
-    df_stats = pd.DataFrame(stats_data)
-    
-    df_stats = df_stats.sort_values(by="Liczba_sasiadow", ascending=False)
+    df_stats = df_stats.sort_values(by="Liczba_sasiadow", ascending=False, kind="stable")
     
     df_stats.insert(0, 'Ranga', range(1, len(df_stats) + 1))
     
@@ -85,35 +138,59 @@ def analyze_core():
     
     print("\n--- HUB WORDS (Top 15) ---")
     print(df_stats.head(15).to_string(index=False))
+
     print("\nGenerowanie wykresu...")
-    plt.figure(figsize=(20, 20))
-    
-    if G.number_of_nodes() > 0:
-        optimal_k = 3.0 / math.sqrt(G.number_of_nodes())
-    else:
-        optimal_k = 0.5
+    with instr.stage("layout", graph.n):
+        pos, cached = cached_layout(graph, optimal_k(graph.n), cache_path=layout_cache)
+    print(f"Układ grafu: {'wczytany z cache' if cached else 'obliczony'}")
 
-    pos = nx.spring_layout(G, k=0.8, iterations=100, seed=42)
-    
-    weights = [G[u][v]['weight'] for u, v in G.edges()]
-    if weights:
-        width = [math.log(w) * 0.5 for w in weights]
-    else:
-        width = 1.0
-    
-    nx.draw_networkx_edges(G, pos, width=width, alpha=0.2, edge_color="gray")
-    
-    node_sizes = [degree_dict.get(n, 1) * 150 for n in G.nodes()]
-    nx.draw_networkx_nodes(G, pos, node_size=node_sizes, node_color="#69b3a2", alpha=0.9)
-    
-    nx.draw_networkx_labels(G, pos, font_size=12, font_family="sans-serif", font_weight="bold",
-                            bbox=dict(facecolor='white', edgecolor='none', alpha=0.7, pad=0.5))
+    with instr.stage("plot", graph.number_of_edges()):
+        fig, ax = plt.subplots(figsize=(20, 20))
 
-    plt.title(f"Rdzeń Języka Fińskiego (Top {TOP_N_WORDS} words co-occurrence)", fontsize=20)
-    plt.axis('off')
-    
-    plt.savefig("fi_core_graph.png", dpi=300, bbox_inches='tight')
-    print("Zapisano czytelniejszy graf jako 'fi_core_graph.png'")
+        edges = graph.upper.tocoo()
+        if edges.nnz:
+            # Wszystkie krawędzie jednym LineCollection zamiast obiektu na krawędź.
+            segments = np.stack([pos[edges.row], pos[edges.col]], axis=1)
+            ax.add_collection(LineCollection(segments, linewidths=np.log(edges.data) * 0.5,
+                                             colors="gray", alpha=0.2, zorder=1))
+
+        ax.scatter(pos[:, 0], pos[:, 1], s=degree * 150, c="#69b3a2", alpha=0.9, zorder=2)
+
+        # Przy tysiącach wierzchołków podpisujemy tylko te o najwyższym stopniu.
+        for i in np.argsort(-degree, kind="stable")[:MAX_LABELS].tolist():
+            ax.text(pos[i, 0], pos[i, 1], top_words[i], fontsize=12, fontfamily="sans-serif", fontweight="bold",
+                    ha="center", va="center", zorder=3,
+                    bbox=dict(facecolor='white', edgecolor='none', alpha=0.7, pad=0.5))
+
+        ax.set_title(f"Rdzeń Języka Fińskiego (Top {len(top_words)} words co-occurrence)", fontsize=20)
+        ax.axis('off')
+        ax.autoscale_view()
+
+        fig.savefig(OUTPUT_GRAPH_PNG, dpi=PLOT_DPI, bbox_inches='tight')
+        plt.close(fig)
+    print(f"Zapisano czytelniejszy graf jako '{OUTPUT_GRAPH_PNG}'")
 
 if __name__ == "__main__":
-    analyze_core()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Rdzeń języka fińskiego – graf współwystąpień")
+    parser.add_argument("--top-n", type=int, default=TOP_N_WORDS,
+                        help="liczba słów rdzenia (wierzchołków grafu)")
+    parser.add_argument("--window", default=WINDOW,
+                        help="okno współwystąpień: adjacent, liczba k (±k pozycji) lub article")
+    parser.add_argument("--limit-articles", type=int, default=LIMIT_ARTICLES,
+                        help="limit artykułów (0 = cały korpus)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="liczba procesów zliczających współwystąpienia (map-reduce po fragmentach korpusu)")
+    parser.add_argument("--no-layout-cache", action="store_true",
+                        help=f"nie używaj cache układu grafu {LAYOUT_CACHE_FILE}")
+    add_source_arguments(parser)
+    add_instrumentation_arguments(parser, "4_analyze_core")
+    args = parser.parse_args()
+    try:
+        parse_window(args.window)
+    except ValueError as e:
+        parser.error(str(e))
+    instr = instrumentation_from_args("4_analyze_core", args)
+    analyze_core(source=args.source, input_file=args.input, top_n=args.top_n, window=args.window,
+                 limit_articles=args.limit_articles, processes=args.processes, instr=instr,
+                 layout_cache=None if args.no_layout_cache else LAYOUT_CACHE_FILE)
+    instr.finish()
\ No newline at end of file
@@ -1,11 +1,14 @@
+import argparse
+
 import pandas as pd
-from deep_translator import GoogleTranslator
+
+from translation import add_translation_arguments, check_translation_args, open_translator, translator_from_args
 
 INPUT_FILE = "fi_top_nouns.csv" 
 OUTPUT_FILE = "fi_nouns_translated.csv"
 LIMIT_ROWS = 50 
 
-def translate_csv():
+def translate_csv(make_translator=open_translator):
     print(f"wczytywanie pliku: {INPUT_FILE}...")
     try:
         df = pd.read_csv(INPUT_FILE)
@@ -25,23 +28,14 @@ def translate_csv():
     df_subset = df.head(LIMIT_ROWS).copy()
     
     print(f"Rozpoczynam tłumaczenie {len(df_subset)} słów z fińskiego na polski...")
-    print("To może chwilę potrwać (dodajemy opóźnienia, aby nie zablokować API).")
-
-    translator = GoogleTranslator(source='fi', target='pl')
-    translations = []
-
-    for index, row in df_subset.iterrows():
-        word = row[col_name]
-        try:
-            translated_word = translator.translate(word)
-            translations.append(translated_word)
-            
-            print(f"[{index+1}/{len(df_subset)}] {word} -> {translated_word}")
-            
-            
-        except Exception as e:
-            print(f"Błąd przy słowie '{word}': {e}")
-            translations.append("ERROR")
+    print("Słowa już przetłumaczone są brane z cache, pozostałe pobierane równolegle z limitem zapytań.")
+
+    # Tłumacz (połączenie z cache) otwierany dopiero po sprawdzeniu pliku wejściowego i zawsze zamykany.
+    with make_translator() as translator:
+        translations = translator.translate_words(df_subset[col_name])
+
+    for i, (word, translated_word) in enumerate(zip(df_subset[col_name], translations)):
+        print(f"[{i+1}/{len(df_subset)}] {word} -> {translated_word}")
 
     df_subset['polish_translation'] = translations
 
@@ -50,4 +44,8 @@ def translate_csv():
     print("Możesz teraz skopiować te dane do tabeli w raporcie.")
 
 if __name__ == "__main__":
-    translate_csv()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Tłumaczenie najczęstszych rzeczowników (fi -> pl)")
+    add_translation_arguments(parser)
+    args = parser.parse_args()
+    check_translation_args(parser, args)
+    translate_csv(lambda: translator_from_args(args))
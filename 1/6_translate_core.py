@@ -1,11 +1,14 @@
+import argparse
+
 import pandas as pd
-from deep_translator import GoogleTranslator
+
+from translation import add_translation_arguments, check_translation_args, open_translator, translator_from_args
 
 INPUT_FILE = "fi_core_stats.csv"     
 OUTPUT_FILE = "fi_core_translated.csv"
 LIMIT_ROWS = 30
 
-def translate_core_stats():
+def translate_core_stats(make_translator=open_translator):
     print(f"Wczytywanie pliku: {INPUT_FILE}...")
     try:
         df = pd.read_csv(INPUT_FILE)
@@ -21,21 +24,11 @@ def translate_core_stats():
     
     print(f"Rozpoczynam tłumaczenie {len(df_subset)} słów rdzeniowych...")
     
-    translator = GoogleTranslator(source='fi', target='pl')
-    translations = []
-
-    for index, row in df_subset.iterrows():
-        word = row['Słowo']
-        try:
-            translated_word = translator.translate(word)
-            
-            print(f"[{index+1}/{len(df_subset)}] {word:<15} -> {translated_word}")
-            translations.append(translated_word)
-
-            
-        except Exception as e:
-            print(f"Błąd przy słowie '{word}': {e}")
-            translations.append("ERROR")
+    with make_translator() as translator:
+        translations = translator.translate_words(df_subset['Słowo'])
+
+    for i, (word, translated_word) in enumerate(zip(df_subset['Słowo'], translations)):
+        print(f"[{i+1}/{len(df_subset)}] {word:<15} -> {translated_word}")
 
     df_subset['Tłumaczenie_PL'] = translations
 
@@ -44,4 +37,8 @@ def translate_core_stats():
     print("Otwórz ten plik i skopiuj dane do sekcji '4.1 Hub Words' w raporcie.")
 
 if __name__ == "__main__":
-    translate_core_stats()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Tłumaczenie słów rdzenia (fi -> pl)")
+    add_translation_arguments(parser)
+    args = parser.parse_args()
+    check_translation_args(parser, args)
+    translate_core_stats(lambda: translator_from_args(args))
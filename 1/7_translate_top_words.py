@@ -1,13 +1,15 @@
-import pandas as pd
-from deep_translator import GoogleTranslator
+import argparse
+
+from translation import add_translation_arguments, check_translation_args, open_translator, translator_from_args
+from word_counts import read_word_counts
 
 INPUT_FILE = "fi_word_counts.csv"
 OUTPUT_FILE = "fi_top20_translated.csv"
 
-def process_top20():
+def process_top20(make_translator=open_translator):
     print(f"Wczytywanie: {INPUT_FILE}...")
     try:
-        df = pd.read_csv(INPUT_FILE)
+        df = read_word_counts(INPUT_FILE)
     except FileNotFoundError:
         print("BŁĄD: Nie znaleziono pliku!")
         return
@@ -16,18 +18,11 @@ def process_top20():
 
     top20.insert(0, 'Rank', range(1, 21))
     
-    translator = GoogleTranslator(source='fi', target='pl')
-    translations = []
-    
     print("Tłumaczenie...")
-    for i, word in enumerate(top20['word']):
-        try:
-            trans = translator.translate(str(word))
-            translations.append(trans)
-            print(f"{i+1}. {word} -> {trans}")
-        except Exception as e:
-            print(f"Błąd przy {word}: {e}")
-            translations.append("ERROR")
+    with make_translator() as translator:
+        translations = translator.translate_words(top20['word'])
+    for i, (word, trans) in enumerate(zip(top20['word'], translations)):
+        print(f"{i+1}. {word} -> {trans}")
             
     top20['Translation'] = translations
     
@@ -37,4 +32,8 @@ def process_top20():
     print(top20.to_string(index=False))
 
 if __name__ == "__main__":
-    process_top20()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Tłumaczenie 20 najczęstszych słów (fi -> pl)")
+    add_translation_arguments(parser)
+    args = parser.parse_args()
+    check_translation_args(parser, args)
+    process_top20(lambda: translator_from_args(args))
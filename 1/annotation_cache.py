@@ -0,0 +1,49 @@
+"""
+Dyskowy cache anotacji Stanzy (lemat + UPOS dla każdego słowa) w bazie SQLite,
+kluczowany identyfikatorem artykułu i wersją modelu/konfiguracji tagowania.
+"""
+
+import json
+import sqlite3
+import zlib
+
+ANNOTATION_CACHE_FILE = "fi_stanza_cache.sqlite"
+
+
+class AnnotationCache:
+    def __init__(self, model_version, path=ANNOTATION_CACHE_FILE):
+        self.model_version = model_version
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS annotations ("
+            "model TEXT NOT NULL, article_id TEXT NOT NULL, data BLOB NOT NULL, "
+            "PRIMARY KEY (model, article_id))"
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, article_id):
+        """Zwraca listę zdań [[(lemma, upos), ...], ...] albo None, jeśli artykułu nie ma w cache."""
+        row = self.conn.execute(
+            "SELECT data FROM annotations WHERE model = ? AND article_id = ?",
+            (self.model_version, article_id),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, article_id, sentences):
+        data = zlib.compress(json.dumps(sentences, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO annotations (model, article_id, data) VALUES (?, ?, ?)",
+            (self.model_version, article_id, data),
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,195 @@
+"""
+Benchmark potoku na syntetycznym zrzucie: generuje zrzut Wikipedii (.xml.bz2) o zipfowskim słownictwie,
+uruchamia skrypty 1, 2 i 4 w katalogu tymczasowym i mierzy dla każdego etapu czas, artykuły/s, tokeny/s
+(z liczb artykułów i tokenów w raporcie uruchomienia skryptu) oraz szczytowe RSS procesu (os.wait4, gdzie
+jest dostępne). Wyniki zapisuje do JSON, żeby porównywać kolejne uruchomienia.
+"""
+
+import argparse
+import bz2
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DUMP_FILE = "fiwiki-latest-pages-articles.xml.bz2"
+OUTPUT_JSON = "fi_benchmark.json"
+BENCH_ARTICLES = 2000
+BENCH_VOCAB = 50000
+BENCH_ZIPF_S = 1.1
+BENCH_SEED = 42
+BENCH_BOOTSTRAP = 10
+ARTICLE_TOKENS = (60, 600)
+SYLLABLES = [c + v for c in "hjklmnprstv" for v in "aeiouyäö"] + list("aeiouyäö")
+
+STAGES = {
+    "1_process_corpus": ("1_process_corpus.py", lambda a: ["--processes", str(a.processes)]),
+    "2_analyze_zipf": ("2_analyze_zipf.py", lambda a: ["--bootstrap", str(a.bootstrap), "--processes", str(a.processes)]),
+    "4_analyze_core": ("4_analyze_core.py", lambda a: ["--limit-articles", "0", "--processes", str(a.processes)]),
+}
+
+
+def synthetic_word(rank):
+    # Ranga zapisana w systemie o podstawie len(SYLLABLES) – unikalne, fińsko wyglądające słowa.
+    syllables = []
+    rank += len(SYLLABLES)
+    while rank:
+        rank, digit = divmod(rank, len(SYLLABLES))
+        syllables.append(SYLLABLES[digit])
+    return "".join(reversed(syllables))
+
+
+def generate_dump(path, articles=BENCH_ARTICLES, vocab_size=BENCH_VOCAB, s=BENCH_ZIPF_S, seed=BENCH_SEED):
+    """Zapisuje zrzut w formacie MediaWiki z odrobiną znaczników; zwraca liczbę wygenerowanych tokenów."""
+    rng = np.random.default_rng(seed)
+    vocab = np.array([synthetic_word(r) for r in range(vocab_size)], dtype=object)
+    cdf = np.cumsum(np.arange(1, vocab_size + 1, dtype=float) ** -s)
+    cdf /= cdf[-1]
+
+    tokens = 0
+    with bz2.open(path, "wt", encoding="utf-8") as f:
+        f.write('<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/" xml:lang="fi">\n'
+                '<siteinfo><sitename>Wikipedia</sitename></siteinfo>\n')
+        for page in range(articles):
+            length = int(rng.integers(*ARTICLE_TOKENS))
+            words = vocab[np.searchsorted(cdf, rng.random(length))].tolist()
+            tokens += length
+            half = length // 2
+            text = (f"'''{words[0]}''' [[{words[1]}|{words[2]}]] {' '.join(words[3:half])}\n"
+                    f"== {words[half]} ==\n{{{{Tietolaatikko|nimi={words[0]}}}}}\n"
+                    f"{' '.join(words[half + 1:])}<ref>{{{{Verkkoviite|osoite=http://example.org}}}}</ref>")
+            f.write(f"<page><title>Artikkeli {page}</title><ns>0</ns><id>{page + 1}</id>"
+                    f"<revision><id>{page + 100000}</id><text xml:space=\"preserve\">{escape(text)}</text>"
+                    f"</revision></page>\n")
+        f.write("</mediawiki>\n")
+    return tokens
+
+
+def run_stage(script, args, workdir):
+    """Uruchamia skrypt w katalogu roboczym; czas CPU i szczytowe RSS z rusage procesu potomnego (os.wait4),
+    a tam, gdzie go nie ma (Windows), tylko czas."""
+    log_path = os.path.join(workdir, os.path.splitext(script)[0] + ".log")
+    env = dict(os.environ, MPLBACKEND="Agg")
+    start = time.perf_counter()
+    rusage = None
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen([sys.executable, os.path.join(SCRIPT_DIR, script)] + args,
+                                cwd=workdir, stdout=log, stderr=subprocess.STDOUT, env=env)
+        if hasattr(os, "wait4"):
+            _, status, rusage = os.wait4(proc.pid, 0)
+            returncode = os.waitstatus_to_exitcode(status)
+        else:
+            returncode = proc.wait()
+    wall = time.perf_counter() - start
+    if returncode != 0:
+        with open(log_path) as log:
+            print(log.read()[-2000:])
+        raise RuntimeError(f"{script} zakończył się kodem {returncode} (log: {log_path})")
+    if rusage is None:
+        return {"wall_s": round(wall, 3), "cpu_s": None, "peak_rss_mb": None}
+    # ru_maxrss: kilobajty na Linuksie, bajty na macOS.
+    peak_rss = rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {"wall_s": round(wall, 3), "cpu_s": round(rusage.ru_utime + rusage.ru_stime, 3),
+            "peak_rss_mb": round(peak_rss / 2**20, 1)}
+
+
+def run_counters(name, workdir):
+    """Liczniki z raportu uruchomienia skryptu (fi_run_<skrypt>.json): artykuły i tokeny faktycznie
+    przetworzone przez skrypt (po filtrach i limitach); {} dla skryptów, które nie czytają zrzutu."""
+    path = os.path.join(workdir, f"fi_run_{name}.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get("counters", {})
+
+
+def run_benchmark(args, workdir):
+    dump_path = os.path.join(workdir, DUMP_FILE)
+    print(f"Generowanie zrzutu: {args.articles} artykułów, słownik {args.vocab}, s = {args.zipf_s}...")
+    start = time.perf_counter()
+    generated = generate_dump(dump_path, args.articles, args.vocab, args.zipf_s, args.seed)
+    print(f"Zrzut gotowy w {time.perf_counter() - start:.1f}s ({os.path.getsize(dump_path) / 2**20:.1f} MB, "
+          f"{generated} tokenów)")
+
+    results = {}
+    tokens = None
+    for name in args.stages:
+        script, stage_args = STAGES[name]
+        print(f"Etap {name}...")
+        stage = run_stage(script, stage_args(args), workdir)
+        counters = run_counters(name, workdir)
+        # Przepustowość tylko dla skryptów, które raportują, ile artykułów i tokenów faktycznie przetworzyły.
+        for key in ("articles", "tokens"):
+            if counters.get(key):
+                stage[key] = counters[key]
+                stage[f"{key}_per_s"] = round(counters[key] / stage["wall_s"], 1)
+        if name == "1_process_corpus":
+            tokens = counters.get("tokens")
+        results[name] = stage
+        print("  " + ", ".join(f"{k}={v}" for k, v in stage.items()))
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": {"articles": args.articles, "vocab": args.vocab, "zipf_s": args.zipf_s, "seed": args.seed,
+                   "processes": args.processes, "bootstrap": args.bootstrap},
+        "tokens": tokens,
+        "stages": results,
+    }
+
+
+def compare(report, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\n--- PORÓWNANIE Z {baseline_path} ({baseline['timestamp']}) ---")
+    for name, stage in report["stages"].items():
+        old = baseline["stages"].get(name)
+        if old is None:
+            continue
+        line = (f"{name:<18} czas {old['wall_s']:>8.2f}s -> {stage['wall_s']:>8.2f}s "
+                f"(x{stage['wall_s'] / old['wall_s']:.2f})")
+        if old.get("peak_rss_mb") is not None and stage["peak_rss_mb"] is not None:
+            line += f", RSS {old['peak_rss_mb']:.0f} -> {stage['peak_rss_mb']:.0f} MB"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark skryptów 1, 2 i 4 na syntetycznym zrzucie Wikipedii")
+    parser.add_argument("--articles", type=int, default=BENCH_ARTICLES, help="liczba artykułów zrzutu")
+    parser.add_argument("--vocab", type=int, default=BENCH_VOCAB, help="rozmiar słownika zipfowskiego")
+    parser.add_argument("--zipf-s", type=float, default=BENCH_ZIPF_S, help="wykładnik rozkładu Zipfa")
+    parser.add_argument("--seed", type=int, default=BENCH_SEED, help="ziarno generatora")
+    parser.add_argument("--processes", type=int, default=1, help="--processes przekazywane do skryptów")
+    parser.add_argument("--bootstrap", type=int, default=BENCH_BOOTSTRAP, help="--bootstrap dla skryptu 2")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help="etapy do uruchomienia oddzielone przecinkami")
+    parser.add_argument("--output", default=OUTPUT_JSON, help="plik JSON z wynikami")
+    parser.add_argument("--compare", default=None, help="poprzedni plik JSON do porównania")
+    parser.add_argument("--workdir", default=None,
+                        help="katalog roboczy (domyślnie tymczasowy, usuwany po zakończeniu)")
+    args = parser.parse_args()
+    args.stages = args.stages.split(",")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="fi_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        report = run_benchmark(args, workdir)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nZapisano wyniki benchmarku do: {args.output}")
+    if args.compare:
+        compare(report, args.compare)
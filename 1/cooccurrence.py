@@ -0,0 +1,161 @@
+"""
+Silnik współwystąpień: tokeny -> identyfikatory słów rdzenia, pary zliczane w oknie
+(adjacent, ±k, article) do rzadkiej macierzy scipy.sparse (górny trójkąt, i < j).
+Zliczanie równoległe w stylu map-reduce po fragmentach korpusu.
+"""
+
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import sparse
+
+from lemma_dict import load_lemma_dict, get_lemma
+from token_store import TokenStore
+
+FLUSH_PAIRS = 1 << 22
+SHARD_SIZE = 2000
+
+
+def parse_window(window):
+    """'adjacent' -> 1, '5' -> 5 (±5 pozycji), 'article' bez zmian."""
+    if window == "adjacent":
+        return 1
+    if window == "article":
+        return window
+    if window == "sentence":
+        # Żadne źródło korpusu nie zachowuje granic zdań (WikiCorpus usuwa interpunkcję).
+        raise ValueError("Okno 'sentence' nie jest obsługiwane: źródła korpusu nie przekazują granic zdań")
+    try:
+        k = int(window)
+    except ValueError:
+        raise ValueError(f"Nieznane okno: {window} (dostępne: adjacent, liczba k, article)") from None
+    if k < 1:
+        raise ValueError(f"Okno musi być >= 1, podano {window}")
+    return k
+
+
+class CoreIndexer:
+    """Mapuje formy wyrazowe na identyfikatory słów rdzenia przez słownik lematów (-1 = spoza rdzenia)."""
+
+    def __init__(self, vocab, lemma_dict):
+        self.word_ids = {word: i for i, word in enumerate(vocab)}
+        self.lemma_dict = lemma_dict
+        self.form_ids = {}
+
+    def _form_id(self, form):
+        form_id = self.form_ids.get(form)
+        if form_id is None:
+            form_id = self.form_ids[form] = self.word_ids.get(get_lemma(self.lemma_dict, form), -1)
+        return form_id
+
+    def ids(self, text):
+        ids = np.fromiter(map(self._form_id, text), dtype=np.int64, count=len(text))
+        return ids[ids >= 0]
+
+
+class CooccurrenceCounter:
+    """Liczy pary w oknie po sekwencji słów rdzenia (jak dotąd: po odfiltrowaniu pozostałych tokenów)."""
+
+    def __init__(self, size, window="adjacent"):
+        self.size = size
+        self.window = parse_window(window)
+        self.matrix = sparse.csr_matrix((size, size), dtype=np.int64)
+        self._rows = []
+        self._cols = []
+        self._pending = 0
+
+    def add(self, ids):
+        if self.window == "article":
+            self._add_all_pairs(np.unique(ids))
+        else:
+            for d in range(1, min(self.window, len(ids) - 1) + 1):
+                self._add_pairs(ids[:-d], ids[d:])
+        if self._pending >= FLUSH_PAIRS:
+            self.flush()
+
+    def _add_all_pairs(self, unique_ids):
+        i, j = np.triu_indices(len(unique_ids), k=1)
+        self._add_pairs(unique_ids[i], unique_ids[j])
+
+    def _add_pairs(self, a, b):
+        mask = a != b
+        a, b = a[mask], b[mask]
+        self._rows.append(np.minimum(a, b))
+        self._cols.append(np.maximum(a, b))
+        self._pending += len(a)
+
+    def flush(self):
+        if not self._pending:
+            return
+        rows, cols = np.concatenate(self._rows), np.concatenate(self._cols)
+        data = np.ones(len(rows), dtype=np.int64)
+        self.matrix = self.matrix + sparse.coo_matrix((data, (rows, cols)), shape=(self.size, self.size)).tocsr()
+        self._rows, self._cols, self._pending = [], [], 0
+
+    def result(self):
+        self.flush()
+        return self.matrix
+
+
+_worker_state = {}
+
+
+def _init_worker(vocab, window):
+    _worker_state["indexer"] = CoreIndexer(vocab, load_lemma_dict())
+    _worker_state["size"] = len(vocab)
+    _worker_state["window"] = window
+
+
+def _count_shard(shard):
+    # Map: fragment korpusu (lista artykułów albo zakres magazynu tokenów) -> częściowa macierz CSR.
+    counter = CooccurrenceCounter(_worker_state["size"], _worker_state["window"])
+    indexer = _worker_state["indexer"]
+    if isinstance(shard, tuple):
+        prefix, start, stop = shard
+        texts = TokenStore(prefix).get_texts(start, stop)
+    else:
+        texts = shard
+    articles = 0
+    for text in texts:
+        counter.add(indexer.ids(text))
+        articles += 1
+    return articles, counter.result()
+
+
+def count_parallel(corpus, vocab, window="adjacent", limit_articles=None, processes=2,
+                   shard_size=SHARD_SIZE, store_prefix=None, instr=None):
+    """Reduce: suma częściowych macierzy z procesów roboczych. Magazyn tokenów dzielony jest na zakresy
+    artykułów czytane bezpośrednio w procesach, pozostałe źródła – na paczki artykułów."""
+    if store_prefix is not None:
+        stop = len(corpus) if not limit_articles else min(limit_articles, len(corpus))
+        shards = ((store_prefix, start, min(start + shard_size, stop)) for start in range(0, stop, shard_size))
+    else:
+        texts = corpus.get_texts()
+        if limit_articles:
+            texts = itertools.islice(texts, limit_articles)
+        shards = iter(lambda: list(itertools.islice(texts, shard_size)), [])
+
+    total = sparse.csr_matrix((len(vocab), len(vocab)), dtype=np.int64)
+    articles = 0
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                             initargs=(vocab, window)) as pool:
+        pending = deque()
+
+        def collect():
+            nonlocal total, articles
+            shard_articles, matrix = pending.popleft().result()
+            total = total + matrix
+            articles += shard_articles
+
+        for shard in shards:
+            pending.append(pool.submit(_count_shard, shard))
+            if len(pending) >= 2 * processes:
+                collect()
+        while pending:
+            collect()
+    print(f"Zliczono współwystąpienia w {articles} artykułach ({processes} procesów)")
+    if instr is not None:
+        instr.count("articles", articles)
+    return total
@@ -0,0 +1,65 @@
+"""
+Wspólny wybór źródła artykułów dla skryptów 1, 3 i 4.
+Każde źródło udostępnia get_texts() zwracające listy tokenów, tak jak WikiCorpus
+(źródło stream tokenizuje po swojemu – patrz stream_corpus.py).
+"""
+
+import itertools
+
+from gensim.corpora import WikiCorpus
+
+from token_store import TokenStore, TOKEN_STORE_PREFIX
+from multistream import MultistreamCorpus, MULTISTREAM_FILE
+from stream_corpus import StreamCorpus
+
+INPUT_FILE = "fiwiki-latest-pages-articles.xml.bz2"
+SOURCES = ("wiki", "store", "multistream", "stream")
+DEFAULT_PATHS = {"wiki": INPUT_FILE, "store": TOKEN_STORE_PREFIX, "multistream": MULTISTREAM_FILE, "stream": INPUT_FILE}
+
+
+def open_corpus(source="wiki", path=None, processes=None, metadata=False):
+    """Otwiera źródło korpusu; `path` domyślnie wskazuje zrzut XML albo prefiks magazynu tokenów.
+    Przy metadata=True get_texts() zwraca (tokens, (pageid, title)), jak WikiCorpus."""
+    path = path or DEFAULT_PATHS.get(source)
+    if source == "wiki":
+        kwargs = {} if processes is None else {"processes": processes}
+        return WikiCorpus(path, dictionary={}, metadata=metadata, **kwargs)
+    if source == "store":
+        return TokenStore(path, metadata=metadata)
+    if source == "multistream":
+        return MultistreamCorpus(path, processes=processes, metadata=metadata)
+    if source == "stream":
+        return StreamCorpus(path, processes=processes, metadata=metadata)
+    raise ValueError(f"Nieznane źródło korpusu: {source} (dostępne: {', '.join(SOURCES)})")
+
+
+def get_texts_from(corpus, start=0, resume_point=None):
+    """Artykuły od numeru `start`; magazyn i multistream przeskakują pominiętą część bez jej czytania,
+    a źródło stream – bez usuwania znaczników i tokenizacji pominiętych stron."""
+    if start == 0:
+        return corpus.get_texts()
+    if isinstance(corpus, TokenStore):
+        return corpus.get_texts(start=start)
+    if isinstance(corpus, (MultistreamCorpus, StreamCorpus)):
+        if resume_point is None:
+            print(f"Punkt kontrolny bez pozycji w zrzucie – {type(corpus).__name__} pomija {start} artykułów, "
+                  f"przetwarzając je ponownie.")
+        return corpus.get_texts(start=start, resume_point=resume_point)
+    print(f"WikiCorpus nie pozwala na skok – pomijam {start} artykułów, czytając je ponownie.")
+    return itertools.islice(corpus.get_texts(), start, None)
+
+
+def resume_point(corpus, article_index):
+    """Dodatkowa informacja o pozycji w źródle zapisywana w punkcie kontrolnym (multistream i stream)."""
+    if isinstance(corpus, (MultistreamCorpus, StreamCorpus)):
+        return corpus.resume_point(article_index)
+    return None
+
+
+def add_source_arguments(parser):
+    parser.add_argument("--source", choices=SOURCES, default="wiki",
+                        help="źródło artykułów: zrzut XML (wiki), magazyn tokenów (store), "
+                             "zrzut multistream z indeksem (multistream) lub zrzut XML czytany "
+                             "strumieniowo bez WikiCorpus (stream)")
+    parser.add_argument("--input", default=None,
+                        help="ścieżka zrzutu albo prefiks magazynu tokenów (domyślnie zależna od źródła)")
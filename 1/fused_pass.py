@@ -0,0 +1,75 @@
+"""
+Jednokrotny odczyt zrzutu Wikipedii dla skryptów 1, 3 i 4.
+Każdy artykuł trafia do zarejestrowanych konsumentów, a każdy z nich zapisuje swój dotychczasowy plik CSV.
+"""
+
+import argparse
+import importlib
+import logging
+import time
+
+from annotation_cache import AnnotationCache
+from corpus_sources import open_corpus, add_source_arguments
+from lemma_dict import load_lemma_dict
+
+CONSUMERS = ("counts", "nouns", "core")
+
+logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s', level=logging.INFO)
+
+
+def build_consumers(names, lemma_dict, source="wiki", pretokenized=False):
+    """Tworzy konsumentów z modułów skryptów 1, 3 i 4."""
+    consumers = {}
+    if "counts" in names:
+        corpus = importlib.import_module("1_process_corpus")
+        consumers["counts"] = corpus.WordCountConsumer(lemma_dict)
+    if "nouns" in names:
+        nouns = importlib.import_module("3_extract_nouns")
+        # Wersja cache anotacji zależy od tokenizatora źródła i trybu – jak w 3_extract_nouns.py.
+        cache = AnnotationCache(nouns.model_version(pretokenized, source))
+        consumers["nouns"] = nouns.NounConsumer(lemma_dict=lemma_dict, pretokenized=pretokenized, cache=cache)
+    if "core" in names:
+        core = importlib.import_module("4_analyze_core")
+        # Rdzeń wybieramy z fi_word_counts.csv z poprzedniego uruchomienia.
+        top_words = core.load_core_words()
+        if top_words is None:
+            print("Pomijam konsumenta 'core' – brak fi_word_counts.csv.")
+        else:
+            consumers["core"] = core.CooccurrenceConsumer(top_words, lemma_dict)
+    return consumers
+
+
+def run_fused(names=CONSUMERS, source="wiki", input_file=None, pretokenized=False):
+    lemma_dict = load_lemma_dict()
+    consumers = build_consumers(names, lemma_dict, source, pretokenized)
+    print(f"Jednokrotny odczyt korpusu (źródło: {source}), konsumenci: {', '.join(consumers)}")
+
+    wiki = open_corpus(source, input_file, metadata=True)
+    start_time = time.time()
+
+    for i, (text, (pageid, _)) in enumerate(wiki.get_texts()):
+        active = [consumer for consumer in consumers.values() if not consumer.done]
+        if not active:
+            break
+        for consumer in active:
+            consumer.consume(text, pageid)
+
+        if i % 1000 == 0:
+            elapsed = time.time() - start_time
+            print(f"Przetworzono {i} artykułów. Aktywni konsumenci: {len(active)}. Czas: {elapsed:.0f}s")
+
+    for name, consumer in consumers.items():
+        print(f"\n=== {name} ===")
+        consumer.finish()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jeden przebieg po korpusie dla zliczania słów, rzeczowników i współwystąpień")
+    parser.add_argument("--consumers", default=",".join(CONSUMERS),
+                        help=f"lista konsumentów oddzielona przecinkami (dostępne: {', '.join(CONSUMERS)})")
+    parser.add_argument("--pretokenized", action="store_true",
+                        help="konsument nouns przekazuje Stanzie gotowe tokeny źródła (jak w 3_extract_nouns.py)")
+    add_source_arguments(parser)
+    args = parser.parse_args()
+    run_fused(names=args.consumers.split(","), source=args.source, input_file=args.input,
+              pretokenized=args.pretokenized)
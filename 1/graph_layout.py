@@ -0,0 +1,171 @@
+"""
+Siłowy układ grafu rdzenia (Fruchterman–Reingold jak w networkx.spring_layout) na macierzy rzadkiej:
+przyciąganie liczone tylko po krawędziach, odpychanie dokładnie dla małych grafów, a dla dużych
+przybliżane siatką komórek w stylu Barnes–Hut. Pozycje są cache'owane w SQLite pod skrótem zbioru
+wierzchołków, krawędzi i parametrów układu – ponowne rysowanie z innym stylem pomija obliczenia.
+"""
+
+import hashlib
+import sqlite3
+
+import numpy as np
+
+LAYOUT_CACHE_FILE = "fi_core_layout.sqlite"
+LAYOUT_ITERATIONS = 100
+LAYOUT_SEED = 42
+EXACT_REPULSION_NODES = 500
+NODES_PER_CELL = 8
+CHUNK_ROWS = 1000
+MIN_DISTANCE = 0.01
+LAYOUT_VERSION = 1
+
+
+def optimal_k(n):
+    return 3.0 / np.sqrt(n) if n > 0 else 0.5
+
+
+def layout_key(graph, k, iterations, seed):
+    """Skrót słów, krawędzi z wagami i parametrów – klucz cache pozycji."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{LAYOUT_VERSION}|{k!r}|{iterations}|{seed}|".encode())
+    h.update("\n".join(graph.words).encode("utf-8"))
+    upper = graph.upper
+    for array in (upper.indptr, upper.indices, upper.data):
+        h.update(np.ascontiguousarray(array, dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+
+def _exact_repulsion(pos, k):
+    displacement = np.zeros_like(pos)
+    for start in range(0, len(pos), CHUNK_ROWS):
+        delta = pos[start:start + CHUNK_ROWS, None, :] - pos[None, :, :]
+        dist2 = np.maximum(np.einsum("ijk,ijk->ij", delta, delta), MIN_DISTANCE ** 2)
+        displacement[start:start + CHUNK_ROWS] = np.einsum("ijk,ij->ik", delta, k * k / dist2)
+    return displacement
+
+
+def _grid_repulsion(pos, k):
+    """Odpychanie przez siatkę: dokładnie w obrębie własnej komórki, od pozostałych komórek – przez
+    ich środek masy (liczba węzłów w komórce jako masa). Siatka jest adaptacyjna – pasy po kwantylach x,
+    w każdym pasie komórki po kwantylach y – więc komórki są równoliczne także wtedy,
+    gdy graf skupia się w środku, a pojedyncze węzły odlatują na brzegi."""
+    n = len(pos)
+    # ~√n węzłów na komórkę równoważy pary wewnątrz komórek (n·√n) z parami węzeł–komórka (n·√n).
+    side = max(1, int(np.ceil(np.sqrt(n / max(NODES_PER_CELL, np.sqrt(n))))))
+    cells = side * side
+    strip = np.empty(n, dtype=np.int64)
+    strip[np.argsort(pos[:, 0], kind="stable")] = np.arange(n) * side // n
+    order = np.lexsort((pos[:, 1], strip))
+    strip_sizes = np.bincount(strip, minlength=side)
+    strip_starts = np.cumsum(strip_sizes) - strip_sizes
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n) - strip_starts[strip[order]]
+    cell = strip * side + rank * side // strip_sizes[strip]
+
+    mass = np.bincount(cell, minlength=cells).astype(float)
+    centroid = np.stack([np.bincount(cell, weights=pos[:, d], minlength=cells) for d in (0, 1)], axis=1)
+    occupied = mass > 0
+    centroid[occupied] /= mass[occupied, None]
+    centroid, mass, cell_index = centroid[occupied], mass[occupied], np.cumsum(occupied) - 1
+
+    displacement = np.zeros_like(pos)
+    own = cell_index[cell]
+    for start in range(0, n, CHUNK_ROWS):
+        rows = slice(start, start + CHUNK_ROWS)
+        delta = pos[rows, None, :] - centroid[None, :, :]
+        dist2 = np.maximum(np.einsum("ijk,ijk->ij", delta, delta), MIN_DISTANCE ** 2)
+        weight = mass[None, :] * k * k / dist2
+        weight[np.arange(len(delta)), own[rows]] = 0.0
+        displacement[rows] = np.einsum("ijk,ij->ik", delta, weight)
+
+    # Pary w obrębie tej samej komórki: `order` jest już posortowany po komórce, każdy z każdym w swoim bloku.
+    sizes = np.bincount(cell, minlength=cells)
+    starts = np.cumsum(sizes) - sizes
+    repeats = sizes[cell]
+    i = np.repeat(np.arange(n), repeats)
+    offsets = np.arange(len(i)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    j = order[starts[cell[i]] + offsets]
+    keep = i != j
+    i, j = i[keep], j[keep]
+    delta = pos[i] - pos[j]
+    dist2 = np.maximum(np.einsum("ij,ij->i", delta, delta), MIN_DISTANCE ** 2)
+    for d in (0, 1):
+        displacement[:, d] += np.bincount(i, weights=delta[:, d] * k * k / dist2, minlength=n)
+    return displacement
+
+
+def force_layout(graph, k=None, iterations=LAYOUT_ITERATIONS, seed=LAYOUT_SEED, exact=None):
+    """Pozycje (n, 2) przeskalowane do [-1, 1] jak w networkx.rescale_layout. `exact` wymusza
+    dokładne (True) albo siatkowe (False) odpychanie; domyślnie zależnie od rozmiaru grafu."""
+    n = graph.n
+    if n == 0:
+        return np.zeros((0, 2))
+    if n == 1:
+        return np.zeros((1, 2))
+    k = optimal_k(n) if k is None else k
+    if exact is None:
+        exact = n <= EXACT_REPULSION_NODES
+    repulsion = _exact_repulsion if exact else _grid_repulsion
+
+    edges = graph.upper.tocoo()
+    u, v, w = edges.row, edges.col, edges.data.astype(float)
+
+    pos = np.random.RandomState(seed).rand(n, 2)
+    t = max(np.ptp(pos[:, 0]), np.ptp(pos[:, 1])) * 0.1
+    dt = t / (iterations + 1)
+    for _ in range(iterations):
+        displacement = repulsion(pos, k)
+        # Przyciąganie tylko wzdłuż krawędzi: O(E) zamiast O(n²).
+        delta = pos[u] - pos[v]
+        dist = np.maximum(np.sqrt(np.einsum("ij,ij->i", delta, delta)), MIN_DISTANCE)
+        pull = delta * (w * dist / k)[:, None]
+        for d in (0, 1):
+            displacement[:, d] -= np.bincount(u, weights=pull[:, d], minlength=n)
+            displacement[:, d] += np.bincount(v, weights=pull[:, d], minlength=n)
+
+        length = np.maximum(np.sqrt(np.einsum("ij,ij->i", displacement, displacement)), MIN_DISTANCE)
+        delta_pos = displacement * (t / length)[:, None]
+        pos += delta_pos
+        t -= dt
+        if np.linalg.norm(delta_pos) / n < 1e-4:
+            break
+
+    pos -= pos.mean(axis=0)
+    scale = np.abs(pos).max()
+    return pos / scale if scale > 0 else pos
+
+
+class LayoutCache:
+    def __init__(self, path=LAYOUT_CACHE_FILE):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS layouts (key TEXT PRIMARY KEY, positions BLOB NOT NULL)")
+
+    def get(self, key):
+        row = self.conn.execute("SELECT positions FROM layouts WHERE key = ?", (key,)).fetchone()
+        return None if row is None else np.frombuffer(row[0], dtype=np.float64).reshape(-1, 2)
+
+    def put(self, key, pos):
+        self.conn.execute("INSERT OR REPLACE INTO layouts (key, positions) VALUES (?, ?)",
+                          (key, np.ascontiguousarray(pos, dtype=np.float64).tobytes()))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def cached_layout(graph, k=None, iterations=LAYOUT_ITERATIONS, seed=LAYOUT_SEED, cache_path=LAYOUT_CACHE_FILE):
+    """force_layout z cache; zwraca (pozycje, czy_trafienie). cache_path=None wyłącza cache."""
+    k = optimal_k(graph.n) if k is None else k
+    if cache_path is None:
+        return force_layout(graph, k, iterations, seed), False
+    cache = LayoutCache(cache_path)
+    try:
+        key = layout_key(graph, k, iterations, seed)
+        pos = cache.get(key)
+        if pos is not None:
+            return pos, True
+        pos = force_layout(graph, k, iterations, seed)
+        cache.put(key, pos)
+        return pos, False
+    finally:
+        cache.close()
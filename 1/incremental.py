@@ -0,0 +1,182 @@
+"""
+Przyrostowa aktualizacja liczności form na podstawie nowego zrzutu: dla każdej strony przechowujemy
+odcisk (page ID, revision ID – albo skrót treści, gdy brak rewizji) i jej wkład w liczności form
+w bazie SQLite. Tokenizowane są tylko strony nowe i zmienione; wkład zmienionych i usuniętych
+jest odejmowany od sum.
+"""
+
+import hashlib
+import sqlite3
+import zlib
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from gensim.corpora.wikicorpus import process_article, IGNORED_NAMESPACES, ARTICLE_MIN_WORDS
+
+from stream_corpus import iter_dump_pages
+
+INCREMENTAL_STORE_FILE = "fi_article_counts.sqlite"
+PAGE_BATCH_SIZE = 200
+
+
+def page_fingerprint(revid, text):
+    """(revid, None), a gdy zrzut nie zawiera rewizji – (None, 64-bitowy skrót treści)."""
+    if revid:
+        return int(revid), None
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return None, int.from_bytes(digest, "little", signed=True)
+
+
+def count_pages(pages):
+    """Proces roboczy: tokenizacja i filtry jak w WikiCorpus; None dla stron odrzuconych (np. przekierowań)."""
+    results = []
+    for pageid, fingerprint, title, text in pages:
+        tokens, title, _ = process_article((text, title, pageid))
+        if len(tokens) < ARTICLE_MIN_WORDS or \
+                any(title.startswith(ignore + ':') for ignore in IGNORED_NAMESPACES):
+            results.append((pageid, fingerprint, None))
+        else:
+            results.append((pageid, fingerprint, Counter(tokens)))
+    return results
+
+
+class ArticleCountStore:
+    """Strony z odciskami i spakowanym wkładem (identyfikatory form uint32 + liczności uint32, zlib)
+    oraz bieżące sumy form. Cała aktualizacja to jedna transakcja SQLite."""
+
+    def __init__(self, path=INCREMENTAL_STORE_FILE):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS forms (id INTEGER PRIMARY KEY, form TEXT NOT NULL UNIQUE);"
+            "CREATE TABLE IF NOT EXISTS pages (pageid INTEGER PRIMARY KEY, revid INTEGER, digest INTEGER, data BLOB);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB);"
+        )
+        self.forms = [form for form, in self.conn.execute("SELECT form FROM forms ORDER BY id")]
+        self.form_ids = {form: i for i, form in enumerate(self.forms)}
+        self.known_forms = len(self.forms)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'totals'").fetchone()
+        self.totals = np.zeros(max(1024, len(self.forms)), dtype=np.int64)
+        if row is not None:
+            stored = np.frombuffer(zlib.decompress(row[0]), dtype=np.int64)
+            self.totals[:len(stored)] = stored
+
+    def fingerprints(self):
+        return {pageid: (revid, digest) for pageid, revid, digest in
+                self.conn.execute("SELECT pageid, revid, digest FROM pages")}
+
+    def _form_id(self, form):
+        form_id = self.form_ids.get(form)
+        if form_id is None:
+            form_id = self.form_ids[form] = len(self.forms)
+            self.forms.append(form)
+            if form_id >= len(self.totals):
+                self.totals = np.concatenate([self.totals, np.zeros(len(self.totals), dtype=np.int64)])
+        return form_id
+
+    def _contribution(self, pageid):
+        row = self.conn.execute("SELECT data FROM pages WHERE pageid = ?", (pageid,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        data = np.frombuffer(zlib.decompress(row[0]), dtype=np.uint32)
+        return data[:len(data) // 2], data[len(data) // 2:]
+
+    def _subtract(self, pageid):
+        old = self._contribution(pageid)
+        if old is not None:
+            # Identyfikatory w obrębie strony są unikalne, więc zwykłe indeksowanie wystarcza.
+            self.totals[old[0]] -= old[1]
+
+    def put(self, pageid, fingerprint, form_counts):
+        """Zastępuje wkład strony nowym (form_counts = None: strona bez wkładu, zapamiętany tylko odcisk)."""
+        self._subtract(pageid)
+        data = None
+        if form_counts:
+            ids = np.fromiter(map(self._form_id, form_counts), dtype=np.uint32, count=len(form_counts))
+            counts = np.fromiter(form_counts.values(), dtype=np.uint32, count=len(form_counts))
+            self.totals[ids] += counts
+            data = zlib.compress(ids.tobytes() + counts.tobytes(), 1)
+        self.conn.execute("INSERT OR REPLACE INTO pages (pageid, revid, digest, data) VALUES (?, ?, ?, ?)",
+                          (pageid, *fingerprint, data))
+
+    def remove(self, pageid):
+        self._subtract(pageid)
+        self.conn.execute("DELETE FROM pages WHERE pageid = ?", (pageid,))
+
+    def form_counts(self):
+        """Counter form o niezerowej liczności w kolejności identyfikatorów (pierwszego wystąpienia)."""
+        present = np.flatnonzero(self.totals[:len(self.forms)])
+        return Counter(dict(zip((self.forms[i] for i in present.tolist()), self.totals[present].tolist())))
+
+    def commit(self):
+        self.conn.executemany("INSERT INTO forms (id, form) VALUES (?, ?)",
+                              enumerate(self.forms[self.known_forms:], self.known_forms))
+        self.known_forms = len(self.forms)
+        totals = zlib.compress(self.totals[:len(self.forms)].tobytes(), 1)
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('totals', ?)", (totals,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def iter_counted_pages(batches, processes):
+    if processes <= 1:
+        for batch in batches:
+            yield from count_pages(batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(count_pages, batch))
+            if len(pending) >= 2 * processes:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def update_counts(path, processes=1, store_path=INCREMENTAL_STORE_FILE, instr=None):
+    """Aktualizuje magazyn wkładów zrzutem `path`; zwraca Counter form po aktualizacji."""
+    store = ArticleCountStore(store_path)
+    known = store.fingerprints()
+    seen = set()
+    stats = Counter()
+
+    def changed_pages():
+        # Niezmienione strony odpadają tu – przed usuwaniem znaczników i tokenizacją.
+        pages = iter_dump_pages(path)
+        if instr is not None:
+            pages = instr.iterate("corpus", pages)
+        batch = []
+        for pageid, revid, title, text in pages:
+            pageid = int(pageid)
+            seen.add(pageid)
+            fingerprint = page_fingerprint(revid, text)
+            old = known.get(pageid)
+            if old == fingerprint:
+                stats["niezmienione"] += 1
+                continue
+            stats["nowe" if old is None else "zmienione"] += 1
+            batch.append((pageid, fingerprint, title, text))
+            if len(batch) >= PAGE_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    results = iter_counted_pages(changed_pages(), processes)
+    if instr is not None:
+        results = instr.iterate("tokenize", results)
+    for pageid, fingerprint, form_counts in results:
+        store.put(pageid, fingerprint, form_counts)
+
+    for pageid in known.keys() - seen:
+        store.remove(pageid)
+        stats["usunięte"] += 1
+
+    store.commit()
+    print("Strony: " + ", ".join(f"{name}: {stats[name]}" for name in ("nowe", "zmienione", "usunięte", "niezmienione")))
+    form_counts = store.form_counts()
+    store.close()
+    return form_counts
@@ -0,0 +1,221 @@
+"""
+Lekka instrumentacja skryptów: łączny czas i liczba elementów na etap (czas własny – bez etapów
+zagnieżdżonych), próbkowanie pamięci, opcjonalne profilowanie (cProfile / pyinstrument) wybranego
+zakresu artykułów i raport JSON na koniec uruchomienia.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+MEMORY_SAMPLE_SECONDS = 1.0
+MAX_MEMORY_SAMPLES = 1000
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+def rss_mb():
+    """Bieżące RSS procesu (z /proc na Linuksie, w przeciwnym razie szczytowe z getrusage);
+    None, gdy nie ma ani jednego, ani drugiego (Windows)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def parse_range(value):
+    """'1000:2000' -> (1000, 2000): profilowane są artykuły o indeksach z [1000, 2000)."""
+    start, stop = (int(x) for x in value.split(":"))
+    if stop <= start:
+        raise ValueError(f"Pusty zakres artykułów: {value}")
+    return start, stop
+
+
+class Instrumentation:
+    def __init__(self, name, report_path=None, profile_range=None, profiler="cprofile"):
+        self.name = name
+        self.report_path = report_path
+        self.profile_range = profile_range
+        self.profiler_name = profiler
+        self.start_time = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self._stack = []
+        self.memory = []
+        self._memory_interval = MEMORY_SAMPLE_SECONDS
+        self._next_sample = 0.0
+        self._profiler = None
+        self.profile_path = None
+        self.sample_memory()
+
+    def _enter(self):
+        self._stack.append(0.0)
+        return time.perf_counter()
+
+    def _exit(self, name, start, items):
+        elapsed = time.perf_counter() - start
+        children = self._stack.pop()
+        if self._stack:
+            self._stack[-1] += elapsed
+        stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0, "items": 0})
+        stage["seconds"] += elapsed - children
+        stage["calls"] += 1
+        stage["items"] += items
+
+    @contextmanager
+    def stage(self, name, items=0):
+        start = self._enter()
+        try:
+            yield
+        finally:
+            self._exit(name, start, items)
+            self.sample_memory()
+
+    def iterate(self, name, iterable, first_article=None):
+        """Czas spędzony w next() iteratora przypisywany jest do etapu `name`, każdy element liczony jako 1.
+        Z `first_article` elementy są artykułami o kolejnych indeksach (próbkowanie pamięci, profilowanie)."""
+        iterator = iter(iterable)
+        index = first_article
+        while True:
+            if index is not None:
+                self.article(index)
+                index += 1
+            start = self._enter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self._exit(name, start, 0)
+                return
+            except BaseException:
+                self._exit(name, start, 0)
+                raise
+            self._exit(name, start, 1)
+            yield item
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_items(self, stage, n):
+        self.stages.setdefault(stage, {"seconds": 0.0, "calls": 0, "items": 0})["items"] += n
+
+    def sample_memory(self, force=False):
+        now = time.perf_counter() - self.start_time
+        if not force and now < self._next_sample:
+            return
+        self._next_sample = now + self._memory_interval
+        rss = rss_mb()
+        if rss is None:
+            return
+        self.memory.append((round(now, 3), round(rss, 1)))
+        if len(self.memory) > MAX_MEMORY_SAMPLES:
+            # Przerzedzamy próbki i wydłużamy odstęp – raport ma stały rozmiar niezależnie od czasu działania.
+            self.memory = self.memory[::2]
+            self._memory_interval *= 2
+
+    def article(self, index):
+        """Wywoływane dla każdego artykułu: próbkowanie pamięci i włączanie/wyłączanie profilera."""
+        self.sample_memory()
+        if self.profile_range is None:
+            return
+        start, stop = self.profile_range
+        if index == start and self._profiler is None:
+            self._start_profiler()
+        elif index >= stop and self._profiler is not None:
+            self._stop_profiler()
+
+    def _start_profiler(self):
+        print(f"Profilowanie ({self.profiler_name}) artykułów {self.profile_range[0]}–{self.profile_range[1] - 1}...")
+        if self.profiler_name == "pyinstrument":
+            from pyinstrument import Profiler
+            self._profiler = Profiler()
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def _stop_profiler(self):
+        base = os.path.splitext(self.report_path or f"fi_run_{self.name}.json")[0]
+        if self.profiler_name == "pyinstrument":
+            self._profiler.stop()
+            self.profile_path = base + ".profile.html"
+            with open(self.profile_path, "w", encoding="utf-8") as f:
+                f.write(self._profiler.output_html())
+        else:
+            self._profiler.disable()
+            self.profile_path = base + ".prof"
+            self._profiler.dump_stats(self.profile_path)
+        self._profiler = None
+        print(f"Zapisano profil do: {self.profile_path}")
+
+    def report(self):
+        wall = time.perf_counter() - self.start_time
+        stages = {}
+        for name, stage in self.stages.items():
+            stages[name] = {
+                "seconds": round(stage["seconds"], 4),
+                "calls": stage["calls"],
+                "items": stage["items"],
+                "items_per_s": round(stage["items"] / stage["seconds"], 1) if stage["seconds"] else None,
+                "share": round(stage["seconds"] / wall, 4) if wall else None,
+            }
+        return {
+            "script": self.name,
+            "argv": sys.argv,
+            "wall_s": round(wall, 3),
+            "stages": stages,
+            "counters": self.counters,
+            "memory": {
+                "peak_rss_mb": max((mb for _, mb in self.memory), default=None),
+                "samples": self.memory,
+            },
+            "profile": self.profile_path,
+        }
+
+    def finish(self):
+        if self._profiler is not None:
+            self._stop_profiler()
+        self.sample_memory(force=True)
+        report = self.report()
+
+        print("\n--- ETAPY ---")
+        for name, stage in sorted(report["stages"].items(), key=lambda kv: -kv[1]["seconds"]):
+            rate = f", {stage['items_per_s']:.1f}/s" if stage["items"] and stage["items_per_s"] else ""
+            print(f"{name:<12} {stage['seconds']:>9.2f}s ({stage['share'] * 100:5.1f}%), "
+                  f"elementów: {stage['items']}{rate}")
+        peak = report["memory"]["peak_rss_mb"]
+        print(f"Czas całkowity: {report['wall_s']:.2f}s"
+              + (f", szczytowe RSS: {peak:.0f} MB" if peak is not None else ""))
+
+        if self.report_path:
+            with open(self.report_path, "w") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"Zapisano raport do: {self.report_path}")
+        return report
+
+
+def add_instrumentation_arguments(parser, name, profile=True):
+    parser.add_argument("--report", default=f"fi_run_{name}.json",
+                        help="plik raportu JSON z czasami etapów i pamięcią ('' = bez zapisu)")
+    if not profile:
+        return
+    parser.add_argument("--profile", type=parse_range, default=None, metavar="START:STOP",
+                        help="profiluj artykuły o indeksach z zakresu [START, STOP)")
+    parser.add_argument("--profiler", choices=PROFILERS, default="cprofile",
+                        help="profiler dla --profile (pyinstrument musi być zainstalowany)")
+
+
+def instrumentation_from_args(name, args):
+    return Instrumentation(name, args.report or None, getattr(args, "profile", None),
+                           getattr(args, "profiler", "cprofile"))
@@ -0,0 +1,71 @@
+"""
+Trwały słownik forma -> lemat (Simplemma), współdzielony przez skrypty 1, 3 i 4.
+Każda forma wyrazowa jest lematyzowana tylko raz, a wynik trafia do pliku TSV.
+"""
+
+import os
+
+import numpy as np
+from simplemma import lemmatize
+
+from token_store import Interner
+
+LEMMA_DICT_FILE = "fi_lemma_dict.tsv"
+LANG_CODE = "fi"
+
+
+def load_lemma_dict(path=LEMMA_DICT_FILE):
+    """Wczytuje słownik z pliku TSV (pusty słownik, jeśli plik nie istnieje)."""
+    lemma_dict = {}
+    if not os.path.exists(path):
+        return lemma_dict
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            form, _, lemma = line.rstrip("\n").partition("\t")
+            lemma_dict[form] = lemma
+    print(f"Wczytano słownik lematów: {path} ({len(lemma_dict)} form)")
+    return lemma_dict
+
+
+def save_lemma_dict(lemma_dict, path=LEMMA_DICT_FILE):
+    """Zapisuje słownik atomowo (plik tymczasowy + os.replace)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for form, lemma in lemma_dict.items():
+            f.write(f"{form}\t{lemma}\n")
+    os.replace(tmp_path, path)
+    print(f"Zapisano słownik lematów: {path} ({len(lemma_dict)} form)")
+
+
+def get_lemma(lemma_dict, form, lang=LANG_CODE):
+    """Zwraca lemat formy, lematyzując ją i dopisując do słownika przy pierwszym użyciu."""
+    lemma = lemma_dict.get(form)
+    if lemma is None:
+        lemma = lemma_dict[form] = lemmatize(form, lang=lang)
+    return lemma
+
+
+def lemmatize_forms(forms, lemma_dict, lang=LANG_CODE):
+    """Uzupełnia słownik o brakujące formy; zwraca liczbę wywołań lematyzatora."""
+    calls = 0
+    for form in forms:
+        if form not in lemma_dict:
+            lemma_dict[form] = lemmatize(form, lang=lang)
+            calls += 1
+    return calls
+
+
+def lemma_count_table(form_counts, lemma_dict):
+    """Liczności lematów malejąco jako (tablica lematów, tablica int64). Lematy są internowane
+    do identyfikatorów, a liczności form sumowane jednym np.bincount po identyfikatorach."""
+    lemma_ids = Interner()
+    ids = np.fromiter(map(lemma_ids.__getitem__, map(lemma_dict.__getitem__, form_counts)),
+                      dtype=np.int64, count=len(form_counts))
+    counts = np.fromiter(form_counts.values(), dtype=np.int64, count=len(form_counts))
+    # Wagi bincount są typu float64 – sumy dokładne do 2^53, czyli dla każdego realnego korpusu.
+    totals = np.bincount(ids, weights=counts, minlength=len(lemma_ids)).astype(np.int64)
+    # Sortowanie stabilne: remisy w kolejności pierwszego wystąpienia, jak w Counter.most_common().
+    order = np.argsort(-totals, kind="stable")
+    lemmas = np.empty(len(lemma_ids), dtype=object)
+    lemmas[:] = list(lemma_ids)
+    return lemmas[order], totals[order]
@@ -0,0 +1,237 @@
+"""
+Równoległy odczyt zrzutu `pages-articles-multistream` z pomocą pliku indeksu.
+Niezależne strumienie bz2 są dekompresowane i tokenizowane w procesach roboczych,
+a artykuły zwracane są w kolejności z pliku (tak jak WikiCorpus.get_texts()).
+"""
+
+import argparse
+import bisect
+import bz2
+import os
+import random
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+from gensim.corpora import WikiCorpus
+from gensim.corpora.wikicorpus import process_article, IGNORED_NAMESPACES, ARTICLE_MIN_WORDS
+
+MULTISTREAM_FILE = "fiwiki-latest-pages-articles-multistream.xml.bz2"
+PAGES_PER_STREAM = 100
+STREAMS_PER_TASK = 4
+CHECK_PAGES = 500
+CHECK_PAGES_PER_STREAM = 7
+CHECK_SEED = 42
+
+
+def default_index_path(path):
+    base = path[:-len(".xml.bz2")] if path.endswith(".xml.bz2") else path
+    return base + "-index.txt.bz2"
+
+
+def read_stream_offsets(index_path):
+    """Zwraca posortowane, unikalne przesunięcia strumieni z indeksu `offset:pageid:title`."""
+    offsets = []
+    with bz2.open(index_path, "rt", encoding="utf-8") as f:
+        for line in f:
+            offset = int(line.split(":", 1)[0])
+            if not offsets or offset != offsets[-1]:
+                offsets.append(offset)
+    return offsets
+
+
+def parse_pages(data):
+    """Wyciąga (pageid, revid, title, ns, text) z fragmentu XML zawierającego elementy <page>."""
+    first = data.find(b"<page>")
+    last = data.rfind(b"</page>")
+    if first == -1 or last == -1:
+        return []
+    root = ET.fromstring(b"<pages>" + data[first:last + len(b"</page>")] + b"</pages>")
+    pages = []
+    for page in root.iter("page"):
+        pages.append((
+            page.findtext("id"),
+            page.findtext("revision/id"),
+            page.findtext("title"),
+            page.findtext("ns"),
+            page.findtext("revision/text") or "",
+        ))
+    return pages
+
+
+def read_streams(path, start, end, filter_namespaces=("0",)):
+    """Dekompresuje bajty [start, end) i zwraca listę (tokens, pageid, title) po filtrach WikiCorpus."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = bz2.decompress(f.read(end - start))
+
+    articles = []
+    for pageid, _, title, ns, text in parse_pages(data):
+        if filter_namespaces and ns not in filter_namespaces:
+            continue
+        tokens, title, pageid = process_article((text, title, pageid))
+        if len(tokens) < ARTICLE_MIN_WORDS or \
+                any(title.startswith(ignore + ':') for ignore in IGNORED_NAMESPACES):
+            continue
+        articles.append((tokens, pageid, title))
+    return articles
+
+
+class MultistreamCorpus:
+    """Źródło artykułów z interfejsem get_texts() zgodnym z WikiCorpus."""
+
+    def __init__(self, path=MULTISTREAM_FILE, index_path=None, processes=None,
+                 streams_per_task=STREAMS_PER_TASK, metadata=False):
+        self.path = path
+        self.index_path = index_path or default_index_path(path)
+        self.processes = processes or max(1, (os.cpu_count() or 1) - 1)
+        self.streams_per_task = streams_per_task
+        self.metadata = metadata
+        self._chunk_articles = []
+        self._chunk_offsets = []
+
+    def stream_ranges(self, from_offset=0):
+        offsets = [offset for offset in read_stream_offsets(self.index_path) if offset >= from_offset]
+        bounds = offsets + [os.path.getsize(self.path)]
+        step = self.streams_per_task
+        return [(bounds[i], bounds[min(i + step, len(bounds) - 1)]) for i in range(0, len(offsets), step)]
+
+    def _iter_chunks(self, ranges):
+        if self.processes <= 1:
+            for start, end in ranges:
+                yield read_streams(self.path, start, end)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            pending = deque()
+            for start, end in ranges:
+                pending.append(pool.submit(read_streams, self.path, start, end))
+                if len(pending) >= 2 * self.processes:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def resume_point(self, article_index):
+        """Miejsce wznowienia dla artykułu o danym numerze: przesunięcie paczki strumieni i liczba artykułów do pominięcia."""
+        i = bisect.bisect_right(self._chunk_articles, article_index) - 1
+        return {"offset": self._chunk_offsets[i], "skip": article_index - self._chunk_articles[i]}
+
+    def get_texts(self, start=0, resume_point=None):
+        if resume_point is not None:
+            ranges = self.stream_ranges(resume_point["offset"])
+            skip = resume_point["skip"]
+        else:
+            ranges = self.stream_ranges()
+            skip = start
+        first_article = start - skip
+        self._chunk_articles, self._chunk_offsets = [], []
+
+        for (range_start, _), articles in zip(ranges, self._iter_chunks(ranges)):
+            self._chunk_articles.append(first_article)
+            self._chunk_offsets.append(range_start)
+            first_article += len(articles)
+            if skip:
+                skipped = min(skip, len(articles))
+                articles, skip = articles[skipped:], skip - skipped
+            for tokens, pageid, title in articles:
+                if self.metadata:
+                    yield tokens, (pageid, title)
+                else:
+                    yield tokens
+
+
+def write_multistream(pages, path, index_path=None, pages_per_stream=PAGES_PER_STREAM):
+    """Zapisuje strony (pageid, revid, title, text) jako zrzut multistream z indeksem (np. do testów)."""
+    index_path = index_path or default_index_path(path)
+    header = ('<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/" xml:lang="fi">\n'
+              '  <siteinfo>\n    <sitename>Wikipedia</sitename>\n  </siteinfo>\n')
+    index_lines = []
+
+    def write_stream(f, chunk):
+        offset = f.tell()
+        xml = "".join(
+            f"  <page>\n    <title>{escape(title)}</title>\n    <ns>0</ns>\n    <id>{pageid}</id>\n"
+            f"    <revision>\n      <id>{revid}</id>\n      <text>{escape(text)}</text>\n    </revision>\n  </page>\n"
+            for pageid, revid, title, text in chunk
+        )
+        f.write(bz2.compress(xml.encode("utf-8")))
+        index_lines.extend(f"{offset}:{pageid}:{title}\n" for pageid, _, title, _ in chunk)
+
+    with open(path, "wb") as f:
+        f.write(bz2.compress(header.encode("utf-8")))
+        chunk = []
+        for page in pages:
+            chunk.append(page)
+            if len(chunk) == pages_per_stream:
+                write_stream(f, chunk)
+                chunk = []
+        if chunk:
+            write_stream(f, chunk)
+        f.write(bz2.compress(b"</mediawiki>\n"))
+
+    with bz2.open(index_path, "wt", encoding="utf-8") as f:
+        f.writelines(index_lines)
+
+
+def sample_pages(count=CHECK_PAGES, seed=CHECK_SEED):
+    """Strony (pageid, revid, title, text) do sprawdzania czytnika: artykuły ze znacznikami, a co kilka
+    stron przekierowania i tytuły z przestrzeni nazw, które filtry WikiCorpus odrzucają."""
+    rng = random.Random(seed)
+    words = ["talo", "kissa", "koira", "järvi", "kaupunki", "vuosi", "suomi", "äiti", "öljy", "kieli", "joki", "maa"]
+    pages = []
+    for i in range(count):
+        body = " ".join(rng.choice(words) for _ in range(rng.randint(20, 120)))
+        title = f"Artikkeli {i}"
+        if i % 11 == 0:
+            text = f"#OHJAUS [[{rng.choice(words)}]]"
+        elif i % 13 == 0:
+            title, text = f"Luokka:{title}", body
+        else:
+            text = (f"'''{rng.choice(words)}''' [[{rng.choice(words)}|{rng.choice(words)}]] {body} & "
+                    f"<ref>{{{{Viite}}}}</ref>")
+        pages.append((i + 1, 100000 + i, title, text))
+    return pages
+
+
+def check_against_wikicorpus(workdir, pages=CHECK_PAGES, pages_per_stream=CHECK_PAGES_PER_STREAM, processes=2):
+    """Zapisuje mały zrzut multistream i sprawdza, że MultistreamCorpus zwraca te same artykuły (tokeny,
+    identyfikatory, tytuły) w tej samej kolejności co WikiCorpus, także po wznowieniu z resume_point().
+    Zwraca liczbę artykułów; przy niezgodności zgłasza ValueError."""
+    path = os.path.join(workdir, "fiwiki-check-multistream.xml.bz2")
+    write_multistream(sample_pages(pages), path, pages_per_stream=pages_per_stream)
+    # bz2 czyta plik złożony z wielu strumieni jak jeden, więc WikiCorpus czyta ten sam zrzut bez indeksu.
+    expected = list(WikiCorpus(path, dictionary={}, metadata=True, processes=processes).get_texts())
+    corpus = MultistreamCorpus(path, processes=processes, streams_per_task=2, metadata=True)
+    actual = list(corpus.get_texts())
+    if actual != expected:
+        mismatch = next((i for i, (a, b) in enumerate(zip(actual, expected)) if a != b),
+                        min(len(actual), len(expected)))
+        raise ValueError(f"MultistreamCorpus różni się od WikiCorpus od artykułu {mismatch} "
+                         f"(artykułów: {len(actual)}, oczekiwano {len(expected)})")
+
+    for index in sorted({0, 1, len(expected) // 3, len(expected) - 1}):
+        point = corpus.resume_point(index)
+        resumed = MultistreamCorpus(path, processes=processes, streams_per_task=2, metadata=True)
+        if list(resumed.get_texts(start=index, resume_point=point)) != expected[index:]:
+            raise ValueError(f"Wznowienie od artykułu {index} ({point}) daje inne artykuły niż WikiCorpus")
+    return len(expected)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sprawdzenie czytnika multistream na małym, lokalnie wygenerowanym zrzucie")
+    parser.add_argument("--pages", type=int, default=CHECK_PAGES, help="liczba stron zrzutu testowego")
+    parser.add_argument("--pages-per-stream", type=int, default=CHECK_PAGES_PER_STREAM,
+                        help="liczba stron w jednym strumieniu bz2")
+    parser.add_argument("--processes", type=int, default=2, help="procesy robocze obu czytników")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="fi_multistream_")
+    try:
+        articles = check_against_wikicorpus(workdir, args.pages, args.pages_per_stream, args.processes)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(f"MultistreamCorpus zgodny z WikiCorpus: {articles} artykułów z {args.pages} stron, "
+          f"te same tokeny i kolejność, także po wznowieniu.")
@@ -0,0 +1,211 @@
+"""
+Częstości bigramów i trigramów lematów dla całego zrzutu. Identyfikatory lematów (rangi z tabeli
+częstości) pakowane są w klucze uint64 (64 // n bitów na lemat), zliczane w posortowanych seriach
+zrzucanych na dysk jako .npy, a na końcu scalane k-drogowo z odcięciem po minimalnej liczności.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from corpus_sources import open_corpus, add_source_arguments
+from instrumentation import Instrumentation, add_instrumentation_arguments, instrumentation_from_args
+from lemma_dict import load_lemma_dict, save_lemma_dict, get_lemma
+from word_counts import read_word_counts
+
+INPUT_COUNTS = "fi_word_counts.csv"
+OUTPUT_TEMPLATE = "fi_{n}grams.csv"
+NGRAM_SIZES = (2, 3)
+MIN_COUNT = 5
+RUN_KEYS = 1 << 24
+MERGE_BLOCK = 1 << 20
+UNKNOWN_LEMMA = "<?>"
+
+
+def id_bits(n):
+    return 64 // n
+
+
+class LemmaIndexer:
+    """Mapuje formy na rangi lematów w tabeli częstości; lematy spoza tabeli lub o randze niemieszczącej
+    się w `bits` bitach dostają wspólny identyfikator ostatni (UNKNOWN_LEMMA)."""
+
+    def __init__(self, vocab, lemma_dict, bits):
+        self.unknown = (1 << bits) - 1
+        self.vocab = list(vocab[:self.unknown])
+        self.word_ids = {word: i for i, word in enumerate(self.vocab)}
+        self.lemma_dict = lemma_dict
+        self.form_ids = {}
+
+    def _form_id(self, form):
+        form_id = self.form_ids.get(form)
+        if form_id is None:
+            form_id = self.form_ids[form] = self.word_ids.get(get_lemma(self.lemma_dict, form), self.unknown)
+        return form_id
+
+    def ids(self, text):
+        return np.fromiter(map(self._form_id, text), dtype=np.uint64, count=len(text))
+
+    def words(self, ids):
+        return [self.vocab[i] if i != self.unknown else UNKNOWN_LEMMA for i in ids.tolist()]
+
+
+def pack_ngrams(ids, n):
+    """Klucze n-gramów kolejnych identyfikatorów: pierwszy lemat w najstarszych bitach (porządek
+    kluczy = porządek leksykograficzny krotek identyfikatorów)."""
+    if len(ids) < n:
+        return np.zeros(0, dtype=np.uint64)
+    bits = np.uint64(id_bits(n))
+    keys = ids[:len(ids) - n + 1].copy()
+    for offset in range(1, n):
+        keys <<= bits
+        keys |= ids[offset:len(ids) - n + 1 + offset]
+    return keys
+
+
+def unpack_ngrams(keys, n):
+    """Odwrotność pack_ngrams: tablica (len(keys), n) identyfikatorów."""
+    bits = id_bits(n)
+    mask = np.uint64((1 << bits) - 1)
+    return np.stack([(keys >> np.uint64(bits * (n - 1 - i))) & mask for i in range(n)], axis=1)
+
+
+class RunWriter:
+    """Bufor kluczy; po przekroczeniu `run_keys` sortuje, zlicza (np.unique) i zapisuje serię na dysk."""
+
+    def __init__(self, directory, name, run_keys=RUN_KEYS):
+        self.directory = directory
+        self.name = name
+        self.run_keys = run_keys
+        self.buffer = []
+        self.buffered = 0
+        self.runs = []
+        self.total = 0
+
+    def add(self, keys):
+        if len(keys):
+            self.buffer.append(keys)
+            self.buffered += len(keys)
+            self.total += len(keys)
+        if self.buffered >= self.run_keys:
+            self.spill()
+
+    def spill(self):
+        if not self.buffered:
+            return
+        keys, counts = np.unique(np.concatenate(self.buffer), return_counts=True)
+        base = os.path.join(self.directory, f"{self.name}_{len(self.runs):05d}")
+        np.save(base + ".keys.npy", keys)
+        np.save(base + ".counts.npy", counts.astype(np.int64))
+        self.runs.append(base)
+        self.buffer, self.buffered = [], 0
+
+
+def merge_runs(runs, min_count=MIN_COUNT, block=MERGE_BLOCK):
+    """Scalanie k-drogowe posortowanych serii (pamięć mapowana) blokami: z każdej serii bierzemy kolejny blok,
+    granicą jest najmniejszy ostatni klucz bloków, a wszystko <= granicy scalamy jednym sortowaniem –
+    klucze większe mogą jeszcze wystąpić w dalszej części innych serii. Zwraca (klucze, liczności) >= min_count."""
+    keys = [np.load(base + ".keys.npy", mmap_mode="r") for base in runs]
+    counts = [np.load(base + ".counts.npy", mmap_mode="r") for base in runs]
+    positions = [0] * len(runs)
+    out_keys, out_counts = [], []
+
+    while True:
+        active = [i for i in range(len(runs)) if positions[i] < len(keys[i])]
+        if not active:
+            break
+        bound = min(keys[i][min(positions[i] + block, len(keys[i])) - 1] for i in active)
+        chunk_keys, chunk_counts = [], []
+        for i in active:
+            stop = positions[i] + np.searchsorted(keys[i][positions[i]:positions[i] + block], bound, side="right")
+            chunk_keys.append(keys[i][positions[i]:stop])
+            chunk_counts.append(counts[i][positions[i]:stop])
+            positions[i] = stop
+        merged, inverse = np.unique(np.concatenate(chunk_keys), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(chunk_counts), minlength=len(merged)).astype(np.int64)
+        keep = totals >= min_count
+        out_keys.append(merged[keep])
+        out_counts.append(totals[keep])
+
+    if not out_keys:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(out_keys), np.concatenate(out_counts)
+
+
+def ngram_table(keys, counts, n, indexer):
+    """Ramka (ngram, count) malejąco po liczności; remisy w porządku kluczy."""
+    order = np.argsort(-counts, kind="stable")
+    ids = unpack_ngrams(keys[order], n)
+    columns = [indexer.words(ids[:, i]) for i in range(n)]
+    return pd.DataFrame({"ngram": [" ".join(words) for words in zip(*columns)], "count": counts[order]})
+
+
+def count_ngrams(source="wiki", input_file=None, sizes=NGRAM_SIZES, min_count=MIN_COUNT, limit_articles=0,
+                 run_keys=RUN_KEYS, tmp_dir=None, instr=None):
+    instr = instr or Instrumentation("ngrams")
+    with instr.stage("load"):
+        vocab = read_word_counts(INPUT_COUNTS, columns=["word"])["word"].astype(str).tolist()
+        lemma_dict = load_lemma_dict()
+    known_forms = len(lemma_dict)
+    # Najszerszy identyfikator, jaki mieści się w kluczach wszystkich rozmiarów n-gramów.
+    indexer = LemmaIndexer(vocab, lemma_dict, id_bits(max(sizes)))
+    print(f"Lematów z identyfikatorem: {len(indexer.vocab)} z {len(vocab)}; n-gramy: {', '.join(map(str, sizes))}")
+
+    spill_dir = tempfile.mkdtemp(prefix="fi_ngrams_", dir=tmp_dir)
+    try:
+        writers = {n: RunWriter(spill_dir, f"{n}gram", run_keys) for n in sizes}
+        wiki = open_corpus(source, input_file)
+        for article, text in enumerate(instr.iterate("corpus", wiki.get_texts(), first_article=0)):
+            if limit_articles and article >= limit_articles:
+                break
+            with instr.stage("encode", len(text)):
+                ids = indexer.ids(text)
+                keys = {n: pack_ngrams(ids, n) for n in sizes}
+            with instr.stage("spill"):
+                for n in sizes:
+                    writers[n].add(keys[n])
+            if article % 10000 == 0:
+                print(f"Przetworzono {article} artykułów. Serii na dysku: "
+                      + ", ".join(f"{n}-gramy: {len(writers[n].runs)}" for n in sizes))
+
+        if len(lemma_dict) > known_forms:
+            save_lemma_dict(lemma_dict)
+
+        for n in sizes:
+            writer = writers[n]
+            with instr.stage("spill"):
+                writer.spill()
+            with instr.stage("merge", writer.total):
+                keys, counts = merge_runs(writer.runs, min_count)
+            with instr.stage("save", len(keys)):
+                df = ngram_table(keys, counts, n, indexer)
+                output = OUTPUT_TEMPLATE.format(n=n)
+                df.to_csv(output, index=False)
+            print(f"\n{n}-gramy: {writer.total} wystąpień, {len(writer.runs)} serii, "
+                  f"{len(df)} różnych z licznością >= {min_count}. Zapisano do: {output}")
+            print(df.head(10).to_string(index=False))
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Częstości bigramów i trigramów lematów (serie na dysku + scalanie k-drogowe)")
+    parser.add_argument("--n", type=int, nargs="+", default=list(NGRAM_SIZES), choices=(2, 3, 4),
+                        help="rozmiary n-gramów")
+    parser.add_argument("--min-count", type=int, default=MIN_COUNT,
+                        help="minimalna liczność n-gramu w tabeli wynikowej")
+    parser.add_argument("--limit-articles", type=int, default=0, help="limit artykułów (0 = cały korpus)")
+    parser.add_argument("--run-keys", type=int, default=RUN_KEYS,
+                        help="liczba kluczy w buforze przed zapisaniem posortowanej serii na dysk")
+    parser.add_argument("--tmp-dir", default=None, help="katalog na serie tymczasowe (domyślnie systemowy)")
+    add_source_arguments(parser)
+    add_instrumentation_arguments(parser, "ngrams")
+    args = parser.parse_args()
+    instr = instrumentation_from_args("ngrams", args)
+    count_ngrams(source=args.source, input_file=args.input, sizes=sorted(set(args.n)), min_count=args.min_count,
+                 limit_articles=args.limit_articles, run_keys=args.run_keys, tmp_dir=args.tmp_dir, instr=instr)
+    instr.finish()
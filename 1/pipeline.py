@@ -0,0 +1,318 @@
+"""
+Uruchamianie skryptów 1–7 jako grafu zależności: każdy krok zna swoje pliki wejściowe i wyjściowe.
+Krok jest pomijany, gdy skrót jego wejść, kodu (skrypt i importowane przez niego moduły lokalne), parametrów
+(stałe modułów i argumenty wywołania) oraz wyjścia nie zmieniły się od ostatniego udanego uruchomienia. Niezależne kroki (np. analiza
+Zipfa i ekstrakcja rzeczowników) działają równolegle.
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = "fi_pipeline_state.json"
+DUMP_FILE = "fiwiki-latest-pages-articles.xml.bz2"
+LEMMA_DICT_FILE = "fi_lemma_dict.tsv"
+# Pliki większe od tego progu (zrzut) identyfikujemy rozmiarem i czasem modyfikacji zamiast treścią.
+CONTENT_HASH_MAX_BYTES = 256 * 2**20
+MAX_JOBS = 2
+
+
+class Step:
+    def __init__(self, script, inputs, outputs, locks=(), shared=()):
+        self.name = os.path.splitext(script)[0]
+        self.script = script
+        self.inputs = inputs
+        self.outputs = outputs
+        # Kroki ze wspólną blokadą nie działają jednocześnie (wspólny cache tłumaczeń i limit zapytań).
+        self.locks = set(locks)
+        # Pliki czytane i uzupełniane przez kilka kroków (słownik lematów): zmiana unieważnia krok,
+        # ale nie tworzy zależności między krokami, a dopisywanie przez same kroki potoku – nie unieważnia.
+        self.shared = list(shared)
+
+
+STEPS = [
+    Step("1_process_corpus.py", [DUMP_FILE],
+         ["fi_word_counts.csv", "fi_vocab_growth.csv", "fi_heaps_fit.csv", "heaps_finnish.png"],
+         shared=[LEMMA_DICT_FILE]),
+    Step("2_analyze_zipf.py", ["fi_word_counts.csv"], ["fi_coverage_stats.csv", "fi_zipf_fit.csv", "zipf_finnish.png"]),
+    Step("3_extract_nouns.py", [DUMP_FILE], ["fi_top_nouns.csv"], shared=[LEMMA_DICT_FILE]),
+    Step("4_analyze_core.py", ["fi_word_counts.csv", DUMP_FILE], ["fi_core_stats.csv", "fi_core_graph.png"],
+         shared=[LEMMA_DICT_FILE]),
+    Step("5_translate_nouns.py", ["fi_top_nouns.csv"], ["fi_nouns_translated.csv"], locks=["translations"]),
+    Step("6_translate_core.py", ["fi_core_stats.csv"], ["fi_core_translated.csv"], locks=["translations"]),
+    Step("7_translate_top_words.py", ["fi_word_counts.csv"], ["fi_top20_translated.csv"], locks=["translations"]),
+]
+
+
+def file_fingerprint(path):
+    """Skrót treści pliku, a dla bardzo dużych plików – rozmiar i czas modyfikacji; None, gdy pliku brak."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    if stat.st_size > CONTENT_HASH_MAX_BYTES:
+        return f"size:{stat.st_size}:mtime:{stat.st_mtime_ns}"
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def script_parameters(path):
+    """Stałe modułu skryptu (np. TOP_N_WORDS, LIMIT_ARTICLES) – przypisania nazw WIELKIMI literami;
+    odczytywane z AST, bez importowania skryptu. Wartości niebędące literałami (1 << 22, re.compile(...))
+    reprezentuje tekst wyrażenia."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    params = {}
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1:
+            continue
+        target = node.targets[0]
+        if not isinstance(target, ast.Name) or not target.id.isupper():
+            continue
+        try:
+            value = ast.literal_eval(node.value)
+        except ValueError:
+            params[target.id] = ast.unparse(node.value)
+            continue
+        # Kolejność elementów zbioru zależy od losowania skrótów napisów – sortujemy.
+        if isinstance(value, (set, frozenset)):
+            value = sorted(value, key=repr)
+        params[target.id] = repr(value)
+    return params
+
+
+def local_imports(path):
+    """Moduły z katalogu skryptów importowane przez skrypt, także pośrednio (np. lemma_dict, graph_layout)."""
+    modules, stack = set(), [path]
+    while stack:
+        with open(stack.pop(), encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module_path = os.path.join(SCRIPT_DIR, name.split(".")[0] + ".py")
+                if name not in modules and os.path.exists(module_path):
+                    modules.add(name)
+                    stack.append(module_path)
+    return sorted(modules)
+
+
+def step_parameters(step):
+    """Stałe skryptu kroku oraz – z prefiksem nazwy modułu – stałe importowanych przez niego modułów lokalnych."""
+    script_path = os.path.join(SCRIPT_DIR, step.script)
+    params = script_parameters(script_path)
+    for module in local_imports(script_path):
+        for name, value in script_parameters(os.path.join(SCRIPT_DIR, module + ".py")).items():
+            params[f"{module}.{name}"] = value
+    return params
+
+
+def step_sources(step):
+    """Skróty źródeł skryptu kroku i jego modułów lokalnych – zmiana logiki (np. w cooccurrence.py)
+    unieważnia krok tak samo jak zmiana stałej."""
+    script_path = os.path.join(SCRIPT_DIR, step.script)
+    paths = [step.script] + [module.split(".")[0] + ".py" for module in local_imports(script_path)]
+    return {path: file_fingerprint(os.path.join(SCRIPT_DIR, path)) for path in sorted(set(paths))}
+
+
+def shared_fingerprints(step, workdir):
+    return {path: file_fingerprint(os.path.join(workdir, path)) for path in step.shared}
+
+
+def step_key(step, workdir, args):
+    inputs = {path: file_fingerprint(os.path.join(workdir, path)) for path in step.inputs}
+    params = step_parameters(step)
+    description = json.dumps({"inputs": inputs, "sources": step_sources(step), "params": params, "args": args},
+                             sort_keys=True)
+    return hashlib.blake2b(description.encode("utf-8"), digest_size=16).hexdigest(), inputs
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def producers(steps):
+    """Krok -> kroki, które wytwarzają jego pliki wejściowe."""
+    made_by = {output: step.name for step in steps for output in step.outputs}
+    return {step.name: {made_by[path] for path in step.inputs if path in made_by} for step in steps}
+
+
+def select_steps(targets, steps=STEPS):
+    """Wybrane kroki wraz ze wszystkimi krokami, od których zależą, w kolejności STEPS."""
+    by_name = {step.name: step for step in steps}
+    deps = producers(steps)
+    unknown = [name for name in targets if name not in by_name]
+    if unknown:
+        raise ValueError(f"Nieznane kroki: {', '.join(unknown)} (dostępne: {', '.join(by_name)})")
+    needed = set()
+    stack = list(targets or by_name)
+    while stack:
+        name = stack.pop()
+        if name not in needed:
+            needed.add(name)
+            stack.extend(deps[name])
+    return [step for step in steps if step.name in needed]
+
+
+def run_script(step, args, workdir):
+    log_path = os.path.join(workdir, f"fi_pipeline_{step.name}.log")
+    env = dict(os.environ, MPLBACKEND="Agg")
+    start = time.perf_counter()
+    with open(log_path, "w") as log:
+        returncode = subprocess.call([sys.executable, os.path.join(SCRIPT_DIR, step.script)] + args,
+                                     cwd=workdir, stdout=log, stderr=subprocess.STDOUT, env=env)
+    return returncode, time.perf_counter() - start, log_path
+
+
+def run_pipeline(targets=(), workdir=".", step_args=None, jobs=MAX_JOBS, force=(), dry_run=False,
+                 state_path=STATE_FILE):
+    steps = select_steps(targets)
+    step_args = step_args or {}
+    deps = producers(steps)
+    state_path = os.path.join(workdir, state_path)
+    state = load_state(state_path)
+    force = set(force)
+    # Pliki wspólne na starcie: kroki zgodne z nimi teraz pozostaną zgodne po dopisaniu przez ten przebieg.
+    shared_paths = sorted({path for step in STEPS for path in step.shared})
+    shared_at_start = {path: file_fingerprint(os.path.join(workdir, path)) for path in shared_paths}
+
+    status = {}   # nazwa -> "aktualny" | "wykonany" | "do wykonania" (tryb próbny) | "błąd" | "pominięty"
+    running = {}  # future -> (krok, klucz, wejścia)
+    held_locks = set()
+
+    def up_to_date(step, key):
+        entry = state.get(step.name)
+        if step.name in force or entry is None or entry["key"] != key:
+            return False
+        if entry.get("shared", {}) != shared_fingerprints(step, workdir):
+            return False
+        return all(file_fingerprint(os.path.join(workdir, path)) == entry["outputs"].get(path)
+                   for path in step.outputs)
+
+    print(f"Kroki: {', '.join(step.name for step in steps)} (równolegle: {jobs})")
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while len(status) < len(steps):
+            for step in steps:
+                if step.name in status or any(f[0] is step for f in running.values()):
+                    continue
+                if any(status.get(dep) in ("błąd", "pominięty") for dep in deps[step.name]):
+                    status[step.name] = "pominięty"
+                    print(f"[{step.name}] pominięty – nie powiódł się krok, od którego zależy")
+                    continue
+                if not all(status.get(dep) in ("aktualny", "wykonany", "do wykonania") for dep in deps[step.name]):
+                    continue
+                args = step_args.get(step.name, [])
+                key, inputs = step_key(step, workdir, args)
+                # W trybie próbnym kroki za krokiem do wykonania też byłyby wykonane.
+                upstream_changed = any(status[dep] == "do wykonania" for dep in deps[step.name])
+                if not upstream_changed and up_to_date(step, key):
+                    status[step.name] = "aktualny"
+                    print(f"[{step.name}] aktualny – pomijam")
+                    continue
+                if dry_run:
+                    status[step.name] = "do wykonania"
+                    print(f"[{step.name}] do wykonania")
+                    continue
+                if step.locks & held_locks or len(running) >= jobs:
+                    continue
+                held_locks |= step.locks
+                print(f"[{step.name}] start: {' '.join([step.script] + args)}")
+                running[pool.submit(run_script, step, args, workdir)] = (step, key, inputs)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step, key, inputs = running.pop(future)
+                held_locks -= step.locks
+                returncode, elapsed, log_path = future.result()
+                if returncode != 0:
+                    status[step.name] = "błąd"
+                    print(f"[{step.name}] BŁĄD (kod {returncode}) po {elapsed:.1f}s – log: {log_path}")
+                    continue
+                status[step.name] = "wykonany"
+                state[step.name] = {
+                    "key": key,
+                    "inputs": inputs,
+                    "outputs": {path: file_fingerprint(os.path.join(workdir, path)) for path in step.outputs},
+                    "shared": shared_fingerprints(step, workdir),
+                    "seconds": round(elapsed, 1),
+                    "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                }
+                save_state(state, state_path)
+                print(f"[{step.name}] gotowy w {elapsed:.1f}s")
+
+    if not dry_run:
+        refresh_shared(state, shared_at_start, workdir, status)
+        save_state(state, state_path)
+    return status
+
+
+def refresh_shared(state, shared_at_start, workdir, status):
+    """Kroki wykonane lub aktualne w tym przebiegu oraz kroki zgodne z plikami wspólnymi na jego początku
+    zapisują ich bieżący odcisk: kroki potoku tylko dopisują lematy nowych form, co nie zmienia wyników
+    pozostałych kroków. Ręczna zmiana pliku między uruchomieniami nadal unieważnia kroki, które go czytają."""
+    for step in STEPS:
+        entry = state.get(step.name)
+        if entry is None or not step.shared:
+            continue
+        recorded = entry.get("shared", {})
+        if status.get(step.name) in ("aktualny", "wykonany") \
+                or all(recorded.get(path) == shared_at_start[path] for path in step.shared):
+            entry["shared"] = shared_fingerprints(step, workdir)
+
+
+def parse_step_args(values):
+    """['4_analyze_core=--top-n 100', ...] -> {'4_analyze_core': ['--top-n', '100']}"""
+    step_args = {}
+    for value in values:
+        name, _, args = value.partition("=")
+        step_args.setdefault(name, []).extend(shlex.split(args))
+    return step_args
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Potok skryptów 1–7 z pomijaniem aktualnych kroków")
+    parser.add_argument("steps", nargs="*",
+                        help="kroki do wykonania wraz z zależnościami (domyślnie wszystkie), np. 6_translate_core")
+    parser.add_argument("--jobs", type=int, default=MAX_JOBS, help="liczba kroków wykonywanych jednocześnie")
+    parser.add_argument("--args", action="append", default=[], metavar="KROK=ARGUMENTY",
+                        help="argumenty dla kroku, np. --args '4_analyze_core=--top-n 100' (wchodzą do skrótu)")
+    parser.add_argument("--force", action="append", default=[], metavar="KROK",
+                        help="wykonaj krok nawet wtedy, gdy jest aktualny")
+    parser.add_argument("--dry-run", action="store_true", help="tylko pokaż, które kroki byłyby wykonane")
+    parser.add_argument("--workdir", default=".", help="katalog z danymi i wynikami")
+    args = parser.parse_args()
+
+    status = run_pipeline(args.steps, args.workdir, parse_step_args(args.args), args.jobs,
+                          args.force, args.dry_run)
+    print("\n--- POTOK ---")
+    for name, result in status.items():
+        print(f"{name:<26} {result}")
+    sys.exit(1 if any(result in ("błąd", "pominięty") for result in status.values()) else 0)
@@ -0,0 +1,93 @@
+"""
+Zliczanie słownictwa w ograniczonej pamięci: count-min sketch + struktura heavy hitters (top-k).
+Błąd estymacji count-min: z prawdopodobieństwem 1 - delta nie więcej niż epsilon * N (N = liczba tokenów).
+"""
+
+import hashlib
+import math
+
+import numpy as np
+
+SKETCH_EPSILON = 1e-5
+SKETCH_DELTA = 1e-3
+TOP_K = 100000
+
+
+def hash_pair(item):
+    """Dwie niezależne 64-bitowe wartości skrótu dla napisu (stabilne między uruchomieniami)."""
+    digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+
+
+class CountMinSketch:
+    def __init__(self, epsilon=SKETCH_EPSILON, delta=SKETCH_DELTA):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+        self._rows = np.arange(self.depth)
+
+    def _cells(self, item):
+        # Podwójne haszowanie (Kirsch–Mitzenmacher): kolumna w wierszu i to (h1 + i * h2) mod width.
+        h1, h2 = hash_pair(item)
+        columns = [(h1 + i * h2) % self.width for i in range(self.depth)]
+        return self._rows, columns
+
+    def add(self, item, count=1):
+        """Dodaje `count` wystąpień i zwraca nowe oszacowanie liczności elementu."""
+        cells = self._cells(item)
+        self.table[cells] += count
+        self.total += count
+        return int(self.table[cells].min())
+
+    def estimate(self, item):
+        return int(self.table[self._cells(item)].min())
+
+    def error_bound(self):
+        return self.epsilon * self.total
+
+
+class HeavyHitters:
+    """Top-k z dokładnym liczeniem po przyjęciu; elementy spoza k zastępowane przez oszacowanie ze szkicu."""
+
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self.counts = {}
+        self.threshold = 0
+
+    def update(self, item, count, estimate):
+        if item in self.counts:
+            self.counts[item] += count
+            return
+        if estimate <= self.threshold:
+            return
+        self.counts[item] = estimate
+        # Przycinamy do k dopiero po przekroczeniu 2k, żeby koszt sortowania rozłożył się na wiele wstawień.
+        if len(self.counts) > 2 * self.k:
+            self._prune()
+
+    def _prune(self):
+        top = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:self.k]
+        self.counts = dict(top)
+        self.threshold = top[-1][1]
+
+    def most_common(self):
+        return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:self.k]
+
+
+class SketchCounter:
+    """Strumieniowe liczenie: każdy element trafia do szkicu, a najczęstsze do HeavyHitters."""
+
+    def __init__(self, epsilon=SKETCH_EPSILON, delta=SKETCH_DELTA, k=TOP_K):
+        self.sketch = CountMinSketch(epsilon, delta)
+        self.heavy = HeavyHitters(k)
+
+    def update(self, counts):
+        for item, count in counts.items():
+            estimate = self.sketch.add(item, count)
+            self.heavy.update(item, count, estimate)
+
+    def most_common(self):
+        return self.heavy.most_common()
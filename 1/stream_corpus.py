@@ -0,0 +1,221 @@
+"""
+Lekki strumieniowy odczyt zrzutu Wikipedii bez gensim.WikiCorpus: przyrostowe parsowanie XML
+(iterparse z czyszczeniem elementów – stała pamięć), jednoprzebiegowe usuwanie znaczników wiki
+jednym skompilowanym wyrażeniem i tokenizator uwzględniający pisownię fińską.
+"""
+
+import bisect
+import bz2
+import html
+import os
+import re
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+TOKEN_MIN_LEN = 2
+# Fińskie złożenia bywają długie – WikiCorpus ucina tokeny dłuższe niż 15 znaków.
+TOKEN_MAX_LEN = 40
+ARTICLE_MIN_TOKENS = 50
+PAGE_BATCH_SIZE = 64
+IGNORED_TITLE_PREFIXES = ("Wikipedia", "Category", "File", "Portal", "Template", "MediaWiki", "User",
+                          "Help", "Book", "Draft", "WikiProject", "Special", "Talk")
+# Linki do plików, kategorii, przestrzeni projektu i interwiki znikają razem z podpisem – chyba że cel zaczyna się
+# od dwukropka ([[:Luokka:X|etykieta]]): MediaWiki wyświetla wtedy zwykły link, więc zostaje etykieta albo cel.
+DROPPED_LINK_NAMESPACES = {"tiedosto", "kuva", "file", "image", "media", "luokka", "category",
+                           "wikipedia", "malline", "template", "wikt", "wiktionary", "commons"}
+SKIPPED_TAGS = "math|chem|ce|gallery|timeline|syntaxhighlight|source|score|hiero|code|pre|nowiki|graph|mapframe"
+
+MARKUP = re.compile(r"""
+    (?P<drop><!--.*?(?:-->|\Z)
+        | <ref\b[^>]*/>
+        | <ref\b[^>]*>.*?(?:</ref\s*>|\Z)
+        | <(?P<skipped>""" + SKIPPED_TAGS + r""")\b[^>]*>.*?(?:</(?P=skipped)\s*>|\Z)
+        | </?[a-zA-Z][^>]*>
+        | __[A-Z]+__)
+    | (?P<open>\{\{|^[ \t]*\{\|)
+    | (?P<close>\}\}|^[ \t]*\|\})
+    | (?P<link>\[\[)
+    | (?P<unlink>\]\])
+    | (?P<pipe>\|)
+    | \[(?:https?:|ftp:|//)[^\s\]]*(?P<label>[^\]\n]*)\]
+    | (?P<entity>&(?:\#[0-9]+|\#x[0-9a-fA-F]+|[a-zA-Z]+);)
+""", re.S | re.M | re.I | re.X)
+LINK_NAMESPACE = re.compile(r"\s*([^\[\]|:\n]*):")
+LEADING_COLON = re.compile(r"\s*:")
+INTERWIKI = re.compile(r"[a-z]{2,3}(?:-[a-z]+)*")
+# Litery (bez cyfr i podkreślnika), z łącznikiem w złożeniach (itä-suomi) i apostrofem stopniowania
+# (vaa'an); końcówka fleksyjna po dwukropku przy skrótach (EU:n, USA:ssa) jest odrzucana.
+TOKEN = re.compile(r"([^\W\d_]+(?:[-'’][^\W\d_]+)*)(?::[^\W\d_]+)?")
+
+
+def strip_markup(text):
+    """Tekst artykułu bez szablonów, tabel, przypisów, komentarzy, tagów HTML i celów linków – jeden
+    przebieg po dopasowaniach MARKUP z licznikiem zagnieżdżenia szablonów i stosem otwartych linków."""
+    out = []
+    links = []  # [pozycja w `out`, czy usunąć cały link, czy widoczny cel z dwukropkami bez etykiety]
+    depth = 0
+    position = 0
+    for m in MARKUP.finditer(text):
+        kind = m.lastgroup
+        if depth == 0:
+            out.append(text[position:m.start()])
+        position = m.end()
+
+        if kind == "open":
+            if depth == 0:
+                out.append(" ")
+            depth += 1
+        elif kind == "close":
+            depth = max(depth - 1, 0)
+        elif depth:
+            continue
+        elif kind == "link":
+            if LEADING_COLON.match(text, m.end()):
+                links.append([len(out), False, True])
+            else:
+                namespace = LINK_NAMESPACE.match(text, m.end())
+                namespace = namespace.group(1).strip().lower() if namespace else ""
+                dropped = namespace in DROPPED_LINK_NAMESPACES or bool(INTERWIKI.fullmatch(namespace))
+                links.append([len(out), dropped, False])
+        elif kind == "unlink":
+            # Bez spacji: końcówka doklejona do linku ([[kaupunki]]en) należy do tego samego słowa.
+            if links:
+                start, dropped, colon_target = links.pop()
+                if dropped:
+                    del out[start:]
+                    out.append(" ")
+                elif colon_target:
+                    # [[:Luokka:Kissat]] -> "Luokka Kissat"; dwukropek przy tokenizacji oznacza końcówkę skrótu.
+                    out[start:] = ["".join(out[start:]).replace(":", " ")]
+        elif kind == "pipe":
+            # [[cel|etykieta]]: zostaje etykieta.
+            if links and not links[-1][1]:
+                del out[links[-1][0]:]
+                links[-1][2] = False
+            else:
+                out.append(" ")
+        elif kind == "label":
+            out.append(" " + m.group("label") + " ")
+        elif kind == "entity":
+            out.append(html.unescape(m.group()))
+        else:
+            out.append(" ")
+    if depth == 0:
+        out.append(text[position:])
+    return "".join(out)
+
+
+def tokenize(text, min_len=TOKEN_MIN_LEN, max_len=TOKEN_MAX_LEN):
+    return [token for token in TOKEN.findall(text.lower()) if min_len <= len(token) <= max_len]
+
+
+def iter_dump_pages(path, filter_namespaces=("0",)):
+    """(pageid, revid, title, text) ze zrzutu .xml.bz2 bez tokenizacji; pliki multistream też działają,
+    bo bz2 czyta kolejne strumienie jeden po drugim. Przetworzone strony są usuwane z drzewa."""
+    with bz2.open(path, "rb") as f:
+        root = None
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if root is None:
+                root = elem
+            if event != "end":
+                continue
+            tag = elem.tag
+            if tag.rsplit("}", 1)[-1] != "page":
+                continue
+            ns = tag[:tag.index("}") + 1] if tag.startswith("{") else ""
+            if not filter_namespaces or elem.findtext(ns + "ns") in filter_namespaces:
+                yield (elem.findtext(ns + "id"), elem.findtext(f"{ns}revision/{ns}id"),
+                       elem.findtext(ns + "title"), elem.findtext(f"{ns}revision/{ns}text") or "")
+            # Samo elem.clear() zostawia puste <page> w korzeniu – czyścimy też korzeń.
+            root.clear()
+
+
+def process_page(text, title):
+    """Tokeny artykułu albo None, gdy strona odpada (przekierowanie, za krótka, przestrzeń nazw w tytule)."""
+    if any(title.startswith(prefix + ":") for prefix in IGNORED_TITLE_PREFIXES):
+        return None
+    tokens = tokenize(strip_markup(text))
+    return tokens if len(tokens) >= ARTICLE_MIN_TOKENS else None
+
+
+def process_pages(pages):
+    """Proces roboczy: [(tokens, pageid, title)] dla stron, które przeszły filtry."""
+    articles = []
+    for pageid, title, text in pages:
+        tokens = process_page(text, title)
+        if tokens is not None:
+            articles.append((tokens, pageid, title))
+    return articles
+
+
+class StreamCorpus:
+    """Źródło artykułów z interfejsem get_texts() zgodnym z WikiCorpus."""
+
+    def __init__(self, path, processes=None, metadata=False, batch_size=PAGE_BATCH_SIZE):
+        self.path = path
+        self.processes = processes or max(1, (os.cpu_count() or 1) - 1)
+        self.metadata = metadata
+        self.batch_size = batch_size
+        self._batch_articles = []
+        self._batch_pages = []
+
+    def _batches(self, skip_pages=0):
+        """Paczki stron od strony numer `skip_pages`; wcześniejsze strony są tylko parsowane (bez usuwania
+        znaczników i tokenizacji)."""
+        batch = []
+        for page, (pageid, _, title, text) in enumerate(iter_dump_pages(self.path)):
+            if page < skip_pages:
+                continue
+            batch.append((pageid, title, text))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _iter_batches(self, skip_pages=0):
+        """Listy artykułów (tokens, pageid, title) kolejnych paczek, z liczbą stron paczki."""
+        if self.processes <= 1:
+            for batch in self._batches(skip_pages):
+                yield len(batch), process_pages(batch)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            pending = deque()
+            for batch in self._batches(skip_pages):
+                pending.append((len(batch), pool.submit(process_pages, batch)))
+                if len(pending) >= 2 * self.processes:
+                    pages, future = pending.popleft()
+                    yield pages, future.result()
+            while pending:
+                pages, future = pending.popleft()
+                yield pages, future.result()
+
+    def resume_point(self, article_index):
+        """Miejsce wznowienia dla artykułu o danym numerze: liczba stron zrzutu przed jego paczką i liczba
+        artykułów tej paczki do pominięcia (jak w MultistreamCorpus)."""
+        i = bisect.bisect_right(self._batch_articles, article_index) - 1
+        return {"page": self._batch_pages[i], "skip": article_index - self._batch_articles[i]}
+
+    def get_texts(self, start=0, resume_point=None):
+        if resume_point is not None:
+            first_page, skip = resume_point["page"], resume_point["skip"]
+        else:
+            first_page, skip = 0, start
+        first_article = start - skip
+        self._batch_articles, self._batch_pages = [], []
+
+        for pages, articles in self._iter_batches(first_page):
+            self._batch_articles.append(first_article)
+            self._batch_pages.append(first_page)
+            first_article += len(articles)
+            first_page += pages
+            if skip:
+                skipped = min(skip, len(articles))
+                articles, skip = articles[skipped:], skip - skipped
+            for tokens, pageid, title in articles:
+                if self.metadata:
+                    yield tokens, (pageid, title)
+                else:
+                    yield tokens
@@ -0,0 +1,142 @@
+"""
+Binarny magazyn stokenizowanego korpusu: słownik form + mapowana w pamięci tablica
+identyfikatorów uint32 z przesunięciami artykułów. Budowany raz z WikiCorpus.get_texts().
+"""
+
+import argparse
+import logging
+import os
+import time
+from collections import Counter
+
+import numpy as np
+
+TOKEN_STORE_PREFIX = "fi_tokens"
+INPUT_FILE = "fiwiki-latest-pages-articles.xml.bz2"
+COUNT_CHUNK = 1 << 24
+
+
+class Interner(dict):
+    """Słownik napis -> kolejny identyfikator, nadawany przy pierwszym odwołaniu (kolejność wstawienia)."""
+
+    def __missing__(self, form):
+        token_id = self[form] = len(self)
+        return token_id
+
+
+def store_paths(prefix=TOKEN_STORE_PREFIX):
+    return {
+        "vocab": prefix + ".vocab.txt",
+        "ids": prefix + ".ids.u32",
+        "offsets": prefix + ".offsets.npy",
+        "pageids": prefix + ".pageids.npy",
+    }
+
+
+def store_exists(prefix=TOKEN_STORE_PREFIX):
+    paths = store_paths(prefix)
+    return all(os.path.exists(paths[name]) for name in ("vocab", "ids", "offsets"))
+
+
+def build_token_store(texts, prefix=TOKEN_STORE_PREFIX, metadata=False):
+    """Zapisuje strumień list tokenów jako słownik + tablicę uint32 + przesunięcia artykułów.
+    Przy metadata=True elementy to (tokens, (pageid, title)) i zapisywane są też identyfikatory stron."""
+    paths = store_paths(prefix)
+    vocab = Interner()
+    offsets = [0]
+    pageids = []
+    start_time = time.time()
+
+    with open(paths["ids"] + ".tmp", "wb") as f:
+        for i, text in enumerate(texts):
+            if metadata:
+                text, (pageid, _) = text
+                pageids.append(int(pageid))
+            ids = np.fromiter(map(vocab.__getitem__, text), dtype=np.uint32, count=len(text))
+            f.write(ids.tobytes())
+            offsets.append(offsets[-1] + len(text))
+            if i % 1000 == 0:
+                elapsed = time.time() - start_time
+                print(f"Zapisano {i} artykułów. Tokenów: {offsets[-1]}. Czas: {elapsed:.0f}s")
+
+    with open(paths["vocab"] + ".tmp", "w", encoding="utf-8") as f:
+        for form in vocab:
+            f.write(form + "\n")
+    with open(paths["offsets"] + ".tmp", "wb") as f:
+        np.save(f, np.asarray(offsets, dtype=np.int64))
+    written = ["vocab", "ids", "offsets"]
+    if metadata:
+        with open(paths["pageids"] + ".tmp", "wb") as f:
+            np.save(f, np.asarray(pageids, dtype=np.int64))
+        written.append("pageids")
+
+    for name in written:
+        os.replace(paths[name] + ".tmp", paths[name])
+    print(f"Magazyn tokenów {prefix}: {len(offsets) - 1} artykułów, {offsets[-1]} tokenów, {len(vocab)} form")
+
+
+class TokenStore:
+    """Odczyt magazynu; get_texts() działa jak w WikiCorpus, ale pozwala zacząć od dowolnego artykułu."""
+
+    def __init__(self, prefix=TOKEN_STORE_PREFIX, metadata=False):
+        self.metadata = metadata
+        paths = store_paths(prefix)
+        with open(paths["vocab"], "r", encoding="utf-8") as f:
+            self.vocab = f.read().split("\n")[:-1]
+        self.offsets = np.load(paths["offsets"])
+        if self.offsets[-1] > 0:
+            self.ids = np.memmap(paths["ids"], dtype=np.uint32, mode="r")
+        else:
+            self.ids = np.zeros(0, dtype=np.uint32)
+        self.pageids = np.load(paths["pageids"]) if os.path.exists(paths["pageids"]) else None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def article_ids(self, i):
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def iter_id_arrays(self, start=0, stop=None):
+        stop = len(self) if stop is None else min(stop, len(self))
+        for i in range(start, stop):
+            yield self.article_ids(i)
+
+    def get_texts(self, start=0, stop=None):
+        vocab = self.vocab
+        for i, ids in enumerate(self.iter_id_arrays(start, stop), start):
+            tokens = [vocab[token_id] for token_id in ids.tolist()]
+            if self.metadata:
+                pageid = str(self.pageids[i]) if self.pageids is not None else None
+                yield tokens, (pageid, None)
+            else:
+                yield tokens
+
+    def id_counts(self, start=0, stop=None):
+        """Liczności identyfikatorów w zakresie artykułów (np.bincount po kawałkach)."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        first, last = self.offsets[start], self.offsets[stop]
+        counts = np.zeros(len(self.vocab), dtype=np.int64)
+        for chunk_start in range(first, last, COUNT_CHUNK):
+            chunk = self.ids[chunk_start:min(chunk_start + COUNT_CHUNK, last)]
+            counts += np.bincount(chunk, minlength=len(self.vocab))
+        return counts
+
+    def form_counts(self, start=0, stop=None):
+        """Counter form w kolejności pierwszego wystąpienia (identyfikatory nadawane są w tej kolejności)."""
+        counts = self.id_counts(start, stop)
+        present = np.flatnonzero(counts)
+        return Counter(dict(zip((self.vocab[i] for i in present.tolist()), counts[present].tolist())))
+
+
+if __name__ == "__main__":
+    from gensim.corpora import WikiCorpus
+
+    logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s', level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Jednorazowa konwersja zrzutu Wikipedii do magazynu tokenów")
+    parser.add_argument("--input", default=INPUT_FILE, help="plik zrzutu .xml.bz2")
+    parser.add_argument("--prefix", default=TOKEN_STORE_PREFIX, help="prefiks plików magazynu")
+    args = parser.parse_args()
+
+    wiki = WikiCorpus(args.input, dictionary={}, metadata=True)
+    build_token_store(wiki.get_texts(), args.prefix, metadata=True)
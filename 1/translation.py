@@ -0,0 +1,209 @@
+"""
+Wspólna warstwa tłumaczeń dla skryptów 5–7: trwały cache SQLite kluczowany (język źródłowy, docelowy, słowo),
+równoległe pobieranie w ograniczonej puli wątków z limitem zapytań i ponawianiem oraz wymienne backendy
+(Google Translate albo lokalny słownik TSV „słowo<TAB>tłumaczenie”).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TRANSLATION_CACHE_FILE = "fi_translations.sqlite"
+BACKENDS = ("google", "dictionary")
+SOURCE_LANG = "fi"
+TARGET_LANG = "pl"
+MAX_WORKERS = 4
+RATE_LIMIT = 5.0
+RETRIES = 3
+RETRY_BACKOFF = 1.0
+ERROR = "ERROR"
+
+
+class TranslationCache:
+    def __init__(self, path=TRANSLATION_CACHE_FILE):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "source TEXT NOT NULL, target TEXT NOT NULL, word TEXT NOT NULL, translation TEXT NOT NULL, "
+            "PRIMARY KEY (source, target, word))"
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, source, target, words):
+        """Słownik {słowo: tłumaczenie} dla słów obecnych w cache."""
+        found = {}
+        for word in words:
+            row = self.conn.execute(
+                "SELECT translation FROM translations WHERE source = ? AND target = ? AND word = ?",
+                (source, target, word),
+            ).fetchone()
+            if row is not None:
+                found[word] = row[0]
+        self.hits += len(found)
+        self.misses += len(words) - len(found)
+        return found
+
+    def put_many(self, source, target, translations):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO translations (source, target, word, translation) VALUES (?, ?, ?, ?)",
+            [(source, target, word, translation) for word, translation in translations.items()],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+class GoogleBackend:
+    name = "google"
+
+    def __init__(self, source=SOURCE_LANG, target=TARGET_LANG):
+        from deep_translator import GoogleTranslator
+        self._factory = lambda: GoogleTranslator(source=source, target=target)
+        self._local = threading.local()
+
+    def translate(self, word):
+        # Osobny obiekt tłumacza w każdym wątku (sesja HTTP nie jest współdzielona).
+        if not hasattr(self._local, "translator"):
+            self._local.translator = self._factory()
+        return self._local.translator.translate(word)
+
+
+class DictionaryBackend:
+    """Lokalny słownik TSV – do testów i pracy offline; brak słowa traktowany jest jak błąd tłumaczenia."""
+    name = "dictionary"
+
+    def __init__(self, path):
+        self.entries = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                word, sep, translation = line.rstrip("\n").partition("\t")
+                if sep:
+                    self.entries[word] = translation
+
+    def translate(self, word):
+        try:
+            return self.entries[word]
+        except KeyError:
+            raise KeyError(f"brak słowa w słowniku: {word}") from None
+
+
+def open_backend(backend="google", dictionary=None, source=SOURCE_LANG, target=TARGET_LANG):
+    if backend == "google":
+        return GoogleBackend(source, target)
+    if backend == "dictionary":
+        if dictionary is None:
+            raise ValueError("Backend 'dictionary' wymaga ścieżki do słownika (--dictionary)")
+        return DictionaryBackend(dictionary)
+    raise ValueError(f"Nieznany backend tłumaczeń: {backend}")
+
+
+class RateLimiter:
+    """Co najmniej 1/rate sekundy między kolejnymi zapytaniami, wspólnie dla wszystkich wątków."""
+
+    def __init__(self, rate=RATE_LIMIT):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Translator:
+    def __init__(self, backend, source=SOURCE_LANG, target=TARGET_LANG, cache=None,
+                 workers=MAX_WORKERS, rate=RATE_LIMIT, retries=RETRIES):
+        self.backend = backend
+        self.source = source
+        self.target = target
+        self.cache = cache
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.retries = retries
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _fetch(self, word):
+        for attempt in range(self.retries + 1):
+            self.limiter.wait()
+            with self._lock:
+                self.calls += 1
+            try:
+                return self.backend.translate(word)
+            except Exception as e:
+                if attempt == self.retries or isinstance(e, KeyError):
+                    print(f"Błąd przy słowie '{word}': {e}")
+                    return None
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    def translate_words(self, words):
+        """Tłumaczenia w kolejności wejścia; słowa z cache bez zapytań, reszta równolegle. Błąd -> "ERROR"."""
+        words = [str(word) for word in words]
+        unique = list(dict.fromkeys(words))
+        found = self.cache.get_many(self.source, self.target, unique) if self.cache is not None else {}
+        missing = [word for word in unique if word not in found]
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                fetched = dict(zip(missing, pool.map(self._fetch, missing)))
+            fetched = {word: t for word, t in fetched.items() if t is not None}
+            if self.cache is not None and fetched:
+                self.cache.put_many(self.source, self.target, fetched)
+            found.update(fetched)
+
+        print(f"Tłumaczenia: {len(unique) - len(missing)} z cache, {len(missing)} pobranych "
+              f"({self.calls} zapytań do backendu '{self.backend.name}')")
+        return [found.get(word, ERROR) for word in words]
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_translator(backend="google", dictionary=None, workers=MAX_WORKERS, rate=RATE_LIMIT,
+                    use_cache=True, source=SOURCE_LANG, target=TARGET_LANG):
+    # Najpierw backend: jeśli się nie otworzy, nie zostaje otwarte połączenie z cache.
+    backend = open_backend(backend, dictionary, source, target)
+    cache = TranslationCache() if use_cache else None
+    return Translator(backend, source, target, cache, workers, rate)
+
+
+def add_translation_arguments(parser):
+    parser.add_argument("--backend", choices=BACKENDS, default="google",
+                        help="źródło tłumaczeń: Google Translate albo lokalny słownik TSV")
+    parser.add_argument("--dictionary", default=None,
+                        help="plik TSV 'słowo<TAB>tłumaczenie' dla backendu dictionary")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="liczba wątków pobierających tłumaczenia")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT,
+                        help="maksymalna liczba zapytań na sekundę (0 = bez limitu)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"nie używaj cache tłumaczeń {TRANSLATION_CACHE_FILE}")
+
+
+def check_translation_args(parser, args):
+    """Błędy argumentów tłumaczenia zgłaszane przez parser.error, zanim skrypt zacznie pracę."""
+    if args.backend == "dictionary":
+        if args.dictionary is None:
+            parser.error("backend 'dictionary' wymaga --dictionary PLIK")
+        if not os.path.exists(args.dictionary):
+            parser.error(f"nie znaleziono słownika: {args.dictionary}")
+
+
+def translator_from_args(args):
+    return open_translator(args.backend, args.dictionary, args.workers, args.rate, use_cache=not args.no_cache)
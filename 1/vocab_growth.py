@@ -0,0 +1,162 @@
+"""
+Krzywa przyrostu słownictwa: liczba różnych form i lematów w funkcji liczby tokenów, próbkowana w punktach
+rozłożonych logarytmicznie podczas jednego przebiegu, oraz dopasowanie prawa Heapsa V = K * N^beta.
+Gdy pełnego Countera nie ma (tryb --sketch), liczby typów szacuje HyperLogLog.
+"""
+
+import hashlib
+import math
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+GROWTH_CSV = "fi_vocab_growth.csv"
+HEAPS_FIT_CSV = "fi_heaps_fit.csv"
+GROWTH_PLOT = "heaps_finnish.png"
+GROWTH_MIN_TOKENS = 1000
+GROWTH_POINTS_PER_DECADE = 10
+HLL_PRECISION = 14
+
+
+def hash64(items):
+    """Stabilne między uruchomieniami 64-bitowe skróty napisów (tablica uint64)."""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "little") for item in items),
+        dtype=np.uint64)
+
+
+class HyperLogLog:
+    """Estymator liczby różnych elementów: 2^p rejestrów uint8 (p = 14: 16 KB, błąd względny ~0.8%)."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, items):
+        self.add_hashes(hash64(items))
+
+    def add_hashes(self, hashes):
+        if len(hashes) == 0:
+            return
+        bits = 64 - self.p
+        index = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # Pozycja najstarszej jedynki z log2; zaokrąglenie floata w górę (do 2^(e+1)) poprawiamy przesunięciem.
+        nonzero = rest > 0
+        exponent = np.zeros(len(rest), dtype=np.int64)
+        exponent[nonzero] = np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.int64)
+        too_high = nonzero & ((rest >> exponent.astype(np.uint64)) == 0)
+        exponent[too_high] -= 1
+        rank = np.where(nonzero, bits - exponent, bits + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Poprawka dla małych liczności: zliczanie liniowe po pustych rejestrach.
+            return m * math.log(m / zeros)
+        return float(raw)
+
+
+class GrowthCurve:
+    """Próbki (tokeny, formy, lematy) zbierane, gdy liczba tokenów przekroczy kolejny punkt siatki
+    GROWTH_MIN_TOKENS * 10^(k / GROWTH_POINTS_PER_DECADE)."""
+
+    def __init__(self, min_tokens=GROWTH_MIN_TOKENS, per_decade=GROWTH_POINTS_PER_DECADE):
+        self.min_tokens = min_tokens
+        self.per_decade = per_decade
+        self.samples = []
+        self._k = 0
+
+    @property
+    def next_target(self):
+        return self.min_tokens * 10 ** (self._k / self.per_decade)
+
+    def due(self, tokens):
+        return tokens >= self.next_target
+
+    def record(self, tokens, forms, lemmas=None):
+        if self.samples and self.samples[-1][0] == tokens:
+            self.samples[-1] = (tokens, forms, lemmas)
+        else:
+            self.samples.append((tokens, forms, lemmas))
+        while self.next_target <= tokens:
+            self._k += 1
+
+
+def lemma_types_at(forms, lemma_dict, form_types):
+    """Liczby różnych lematów wśród pierwszych `form_types` form (formy w kolejności pierwszego wystąpienia,
+    jak klucze Countera) – dokładna krzywa lematów bez drugiego przebiegu po korpusie."""
+    first_seen = {}
+    ids = np.fromiter((first_seen.setdefault(lemma_dict[form], len(first_seen)) for form in forms),
+                      dtype=np.int64)
+    # Identyfikatory nadawane są w kolejności pierwszego wystąpienia, więc maksimum prefiksu + 1 = liczba lematów.
+    lemma_types = np.maximum.accumulate(ids) + 1
+    form_types = np.asarray(form_types, dtype=np.int64)
+    return np.where(form_types > 0, lemma_types[np.maximum(form_types, 1) - 1], 0)
+
+
+def fit_heaps(tokens, types):
+    """Prawo Heapsa dla każdej kolumny `types` naraz: jedno lstsq w skali log-log.
+    Zwraca (K, beta, R^2) jako tablice o długości liczby kolumn."""
+    x = np.log(np.asarray(tokens, dtype=float))
+    y = np.log(np.asarray(types, dtype=float).reshape(len(x), -1))
+    design = np.column_stack([np.ones_like(x), x])
+    (log_k, beta), residuals, _, _ = np.linalg.lstsq(design, y, rcond=None)
+    total = np.sum((y - y.mean(axis=0)) ** 2, axis=0)
+    r2 = 1 - residuals / total if len(residuals) else np.full(y.shape[1], np.nan)
+    return np.exp(log_k), beta, r2
+
+
+def plot_growth(df, fits):
+    plt.figure(figsize=(10, 6))
+    for column, color in (("formy", "tab:blue"), ("lematy", "tab:green")):
+        if column not in fits:
+            continue
+        k, beta, _ = fits[column]
+        plt.loglog(df["tokeny"], df[column], marker='.', linestyle='none', color=color, label=column.capitalize())
+        plt.loglog(df["tokeny"], k * df["tokeny"] ** beta, color=color, linewidth=1,
+                   label=f"Heaps ({column}): K = {k:.2f}, beta = {beta:.3f}")
+    plt.legend(loc='upper left')
+    plt.title('Prawo Heapsa - Korpus Fiński')
+    plt.xlabel('Liczba tokenów (skala log)')
+    plt.ylabel('Liczba typów (skala log)')
+    plt.grid(True, which="both", ls="-", alpha=0.2)
+    plt.savefig(GROWTH_PLOT)
+    plt.close()
+    print(f"Wykres przyrostu słownictwa zapisano jako '{GROWTH_PLOT}'")
+
+
+def save_growth(curve, form_counts=None, lemma_dict=None, method="dokładnie"):
+    """Zapisuje krzywą (GROWTH_CSV), dopasowanie (HEAPS_FIT_CSV) i wykres. Brakującą kolumnę lematów
+    uzupełnia z kolejności kluczy `form_counts` i słownika lematów."""
+    if len(curve.samples) < 2:
+        print("Za mało punktów krzywej przyrostu słownictwa – pomijam dopasowanie Heapsa.")
+        return None
+    df = pd.DataFrame(curve.samples, columns=["tokeny", "formy", "lematy"])
+    if df["lematy"].isna().any() and form_counts is not None and lemma_dict is not None:
+        df["lematy"] = lemma_types_at(form_counts, lemma_dict, df["formy"].to_numpy())
+    df["metoda"] = method
+
+    columns = [column for column in ("formy", "lematy") if df[column].notna().all()]
+    k, beta, r2 = fit_heaps(df["tokeny"].to_numpy(), df[columns].to_numpy(dtype=float))
+    fits = {column: (k[i], beta[i], r2[i]) for i, column in enumerate(columns)}
+
+    df.to_csv(GROWTH_CSV, index=False)
+    pd.DataFrame([{"typy": column, "heaps_k": round(fit[0], 4), "heaps_beta": round(fit[1], 4),
+                   "r2": round(fit[2], 5), "punkty": len(df)} for column, fit in fits.items()]
+                 ).to_csv(HEAPS_FIT_CSV, index=False)
+    print("\n--- PRAWO HEAPSA (V = K * N^beta) ---")
+    for column, (k_value, beta_value, r2_value) in fits.items():
+        print(f"{column}: K = {k_value:.3f}, beta = {beta_value:.4f}, R^2 = {r2_value:.4f}")
+    print(f"Zapisano krzywą przyrostu do: {GROWTH_CSV}, dopasowanie do: {HEAPS_FIT_CSV}")
+    plot_growth(df, fits)
+    return fits
@@ -0,0 +1,53 @@
+"""
+Zapis i odczyt tabeli częstości słów: CSV (jak dotąd) oraz kolumnowy Parquet ze słowami kodowanymi
+słownikowo i licznikami int64. Czytelnicy wybierają Parquet, jeśli jest aktualny; pyarrow jest opcjonalny.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+WORD_COUNTS_CSV = "fi_word_counts.csv"
+WORD_COUNTS_PARQUET = "fi_word_counts.parquet"
+
+
+def parquet_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def write_word_counts(df, path=WORD_COUNTS_CSV):
+    """Zapisuje ramkę (word, count) do CSV oraz – jeśli dostępny jest pyarrow – obok do Parquet."""
+    df.to_csv(path, index=False)
+    if pa is None:
+        return
+    table = pa.table({
+        "word": pa.array(df["word"].astype(str).to_numpy(), pa.string()),
+        "count": pa.array(df["count"].to_numpy(dtype=np.int64), pa.int64()),
+    })
+    tmp_path = parquet_path(path) + ".tmp"
+    # Kodowanie słownikowe stron Parquet dla słów; w schemacie zwykły string – odczyt nie odbudowuje
+    # słownika Arrow (przy unikalnych słowach kilkukrotnie wolniejsze niż odczyt napisów).
+    pq.write_table(table, tmp_path, use_dictionary=["word"], compression="zstd")
+    os.replace(tmp_path, parquet_path(path))
+
+
+def columnar_available(path=WORD_COUNTS_CSV):
+    # Parquet starszy niż CSV (np. CSV nadpisany bez pyarrow) nie jest używany.
+    columnar = parquet_path(path)
+    if pq is None or not os.path.exists(columnar):
+        return False
+    return not os.path.exists(path) or os.path.getmtime(columnar) >= os.path.getmtime(path)
+
+
+def read_word_counts(path=WORD_COUNTS_CSV, columns=None):
+    """Tabela częstości z Parquet (gdy jest aktualny), w przeciwnym razie z CSV; `columns` ogranicza odczyt."""
+    if columnar_available(path):
+        return pq.read_table(parquet_path(path), columns=columns).to_pandas()
+    return pd.read_csv(path, usecols=columns)
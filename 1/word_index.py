@@ -0,0 +1,205 @@
+"""
+Trwały indeks tabeli częstości do szybkich zapytań bez wczytywania całego słownictwa: posortowana tablica
+napisów (UTF-8 w jednym pliku + przesunięcia .npy) i tablice rang, liczności oraz sum skumulowanych,
+wszystko otwierane przez mmap. Zapytania: dokładne słowo, prefiks, słowo o randze, ranga dla pokrycia.
+"""
+
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+
+from word_counts import WORD_COUNTS_CSV, read_word_counts
+
+WORD_INDEX_PREFIX = "fi_word_index"
+PREFIX_LIMIT = 20
+ARRAYS = ("offsets", "ranks", "counts", "cumulative", "by_rank")
+
+
+def _source_fingerprint(path):
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _save_array(path, array):
+    np.save(path + ".tmp.npy", array)
+    os.replace(path + ".tmp.npy", path)
+
+
+def build_word_index(counts_path=WORD_COUNTS_CSV, prefix=WORD_INDEX_PREFIX):
+    """Buduje indeks z tabeli częstości (kolejność wierszy = ranga). Pliki:
+    .strings.bin (słowa UTF-8 w porządku bajtowym), .offsets.npy, .ranks.npy (ranga każdego słowa
+    posortowanego), .counts.npy i .cumulative.npy (wg rangi), .by_rank.npy (pozycja słowa o danej randze)
+    oraz .meta.json."""
+    df = read_word_counts(counts_path)
+    words = [str(word).encode("utf-8") for word in df["word"].tolist()]
+    counts = df["count"].to_numpy(dtype=np.int64)
+
+    order = np.array(sorted(range(len(words)), key=words.__getitem__), dtype=np.int64)
+    lengths = np.fromiter((len(words[i]) for i in order.tolist()), dtype=np.int64, count=len(order))
+    offsets = np.zeros(len(words) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    by_rank = np.empty(len(words), dtype=np.int64)
+    by_rank[order] = np.arange(len(words))
+
+    tmp_path = prefix + ".strings.bin.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(words[i] for i in order.tolist()))
+    os.replace(tmp_path, prefix + ".strings.bin")
+    _save_array(prefix + ".offsets.npy", offsets)
+    _save_array(prefix + ".ranks.npy", order + 1)
+    _save_array(prefix + ".counts.npy", counts)
+    _save_array(prefix + ".cumulative.npy", np.cumsum(counts))
+    _save_array(prefix + ".by_rank.npy", by_rank)
+    meta = {"words": len(words), "total": int(counts.sum()), "source": _source_fingerprint(counts_path)}
+    with open(prefix + ".meta.json.tmp", "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(prefix + ".meta.json.tmp", prefix + ".meta.json")
+    print(f"Zbudowano indeks {prefix}.* ({len(words)} słów, {meta['total']} tokenów) z {counts_path}")
+    return meta
+
+
+class WordIndex:
+    def __init__(self, prefix=WORD_INDEX_PREFIX):
+        with open(prefix + ".meta.json") as f:
+            self.meta = json.load(f)
+        self.total = self.meta["total"]
+        self.strings = np.memmap(prefix + ".strings.bin", dtype=np.uint8, mode="r") \
+            if self.meta["words"] else np.zeros(0, dtype=np.uint8)
+        for name in ARRAYS:
+            setattr(self, name, np.load(f"{prefix}.{name}.npy", mmap_mode="r"))
+        # Pliki podmieniane są po kolei, więc czytelnik otwierający indeks w trakcie przebudowy może trafić
+        # na pliki z dwóch budowań – wtedy rozmiary się nie zgadzają i zgłaszamy błąd zamiast złych wyników.
+        words = self.meta["words"]
+        if (len(self.offsets) != words + 1 or int(self.offsets[-1]) != len(self.strings)
+                or any(len(getattr(self, name)) != words for name in ARRAYS[1:])
+                or (words and int(self.cumulative[-1]) != self.total)):
+            raise ValueError(f"Niespójne pliki indeksu {prefix}.* (przebudowa w toku?) – otwórz go ponownie")
+        # Wyszukiwanie binarne czyta pojedyncze elementy – przez memoryview bez narzutu indeksowania numpy.
+        self._strings = memoryview(self.strings)
+        self._offsets = memoryview(self.offsets)
+
+    def __len__(self):
+        return self.meta["words"]
+
+    def is_stale(self):
+        """Czy tabela częstości zmieniła się od zbudowania indeksu."""
+        source = self.meta["source"]
+        try:
+            return _source_fingerprint(source["path"]) != source
+        except FileNotFoundError:
+            return True
+
+    def _key(self, i):
+        return bytes(self._strings[self._offsets[i]:self._offsets[i + 1]])
+
+    def _bisect(self, key):
+        """Pierwsza pozycja posortowanej tablicy o słowie >= key (w porządku bajtów UTF-8)."""
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _entry(self, position):
+        rank = int(self.ranks[position])
+        return {"word": self._key(position).decode("utf-8"), "rank": rank, "count": int(self.counts[rank - 1]),
+                "coverage": float(self.cumulative[rank - 1]) / self.total}
+
+    def lookup(self, word):
+        """{'word', 'rank', 'count', 'coverage'} albo None; coverage = udział tokenów słów o randze <= tej."""
+        key = word.encode("utf-8")
+        position = self._bisect(key)
+        if position < len(self) and self._key(position) == key:
+            return self._entry(position)
+        return None
+
+    def __contains__(self, word):
+        return self.lookup(word) is not None
+
+    def prefix(self, prefix, limit=PREFIX_LIMIT):
+        """Najczęstsze słowa zaczynające się od `prefix` (do `limit`, malejąco po liczności)."""
+        key = prefix.encode("utf-8")
+        lo = self._bisect(key)
+        # Każde słowo z tym prefiksem jest mniejsze od prefiksu z doklejonym bajtem 0xFF (nie występuje w UTF-8).
+        hi = self._bisect(key + b"\xff")
+        ranks = np.asarray(self.ranks[lo:hi])
+        if limit and len(ranks) > limit:
+            ranks = np.partition(ranks, limit - 1)[:limit]
+        return [self.at_rank(int(rank)) for rank in np.sort(ranks)]
+
+    def at_rank(self, rank):
+        if not 1 <= rank <= len(self):
+            raise IndexError(f"Ranga spoza zakresu 1..{len(self)}: {rank}")
+        return self._entry(int(self.by_rank[rank - 1]))
+
+    def rank_for_coverage(self, fraction):
+        """Najmniejsza ranga r, dla której słowa o rangach <= r pokrywają co najmniej `fraction` tokenów
+        (0 dla pustego indeksu)."""
+        if not len(self):
+            return 0
+        target = np.int64(math.ceil(fraction * self.total))
+        rank = int(np.searchsorted(self.cumulative, target, side="left")) + 1
+        return min(rank, len(self))
+
+
+def open_word_index(prefix=WORD_INDEX_PREFIX, counts_path=WORD_COUNTS_CSV):
+    """Otwiera indeks, budując go najpierw, jeśli go nie ma albo tabela częstości jest nowsza."""
+    if not os.path.exists(prefix + ".meta.json"):
+        build_word_index(counts_path, prefix)
+    index = WordIndex(prefix)
+    if index.is_stale() and os.path.exists(counts_path):
+        build_word_index(counts_path, prefix)
+        index = WordIndex(prefix)
+    return index
+
+
+def format_entry(entry):
+    return f"{entry['rank']:>9}  {entry['word']:<30} {entry['count']:>12}  {entry['coverage'] * 100:7.3f}%"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Zapytania o rangę i liczność słów przez indeks mmap")
+    parser.add_argument("--index", default=WORD_INDEX_PREFIX, help="prefiks plików indeksu")
+    parser.add_argument("--counts", default=WORD_COUNTS_CSV, help="tabela częstości, z której budowany jest indeks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="zbuduj (albo przebuduj) indeks")
+    word_parser = commands.add_parser("word", help="ranga, liczność i pokrycie słów")
+    word_parser.add_argument("words", nargs="+")
+    prefix_parser = commands.add_parser("prefix", help="najczęstsze słowa o danym prefiksie")
+    prefix_parser.add_argument("prefix")
+    prefix_parser.add_argument("--limit", type=int, default=PREFIX_LIMIT)
+    rank_parser = commands.add_parser("rank", help="słowa o podanych rangach")
+    rank_parser.add_argument("ranks", type=int, nargs="+")
+    coverage_parser = commands.add_parser("coverage", help="liczba najczęstszych słów pokrywających dany udział tokenów")
+    coverage_parser.add_argument("fractions", type=float, nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_word_index(args.counts, args.index)
+    else:
+        index = open_word_index(args.index, args.counts)
+        if not len(index):
+            raise SystemExit(f"Indeks {args.index} jest pusty (tabela częstości bez słów).")
+        print(f"{'Ranga':>9}  {'Słowo':<30} {'Liczność':>12}  {'Pokrycie':>8}")
+        if args.command == "word":
+            for word in args.words:
+                entry = index.lookup(word)
+                print(format_entry(entry) if entry else f"{'-':>9}  {word:<30} {'brak w indeksie':>12}")
+        elif args.command == "prefix":
+            for entry in index.prefix(args.prefix, args.limit):
+                print(format_entry(entry))
+        elif args.command == "rank":
+            for rank in args.ranks:
+                if 1 <= rank <= len(index):
+                    print(format_entry(index.at_rank(rank)))
+                else:
+                    print(f"{rank:>9}  ranga spoza zakresu 1..{len(index)}")
+        else:
+            for fraction in args.fractions:
+                print(format_entry(index.at_rank(index.rank_for_coverage(fraction))) + f"  (cel: {fraction:.0%})")